@@ -0,0 +1,147 @@
+"""Times the stages of parsing and querying DASware exports of increasing size.
+
+Synthetic exports are written to a working directory (and reused by later runs).
+Every stage is repeated and the fastest wall time is reported, because the slower
+repetitions mostly measure interference from other processes.
+
+Usage:
+    python benchmarks/run.py --sizes 1000 10000 100000 --output results.json
+"""
+
+import argparse
+import json
+import pathlib
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import numpy
+import pandas
+
+import detl
+from detl.parsing import common, dw4, dw5
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent))
+import synthetic  # noqa: E402
+
+N_POINTS = 1000
+
+
+def best_of(func: Callable, repeat: int) -> float:
+    """Returns the shortest wall time of calling `func` in seconds."""
+    times = []
+    for _ in range(repeat):
+        t_start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t_start)
+    return min(times)
+
+
+def stages(filepath: pathlib.Path) -> Dict[str, Callable]:
+    """Creates the benchmarked functions for one export.
+
+    Args:
+        filepath (pathlib.Path): path of the export
+
+    Returns:
+        stages (dict): functions without arguments by stage name
+    """
+    version, encoding = detl.sniff(filepath)
+    module = {detl.DASwareVersion.V4: dw4, detl.DASwareVersion.V5: dw5}[version]
+    data = detl.parse(filepath)
+    block = common.index_blocks(filepath, encoding)[1]["TrackData"]
+    _, trackdata = module.BLOCKPARSERS["TrackData"]("TrackData", block, 1)
+    reactor = data[1]
+    points = numpy.linspace(
+        reactor.dataframe.process_time.min(), reactor.dataframe.process_time.max(), N_POINTS
+    )
+    return {
+        "sniff": lambda: detl.sniff(filepath),
+        "index_blocks": lambda: common.index_blocks(filepath, encoding),
+        "split_blocks": lambda: common.split_blocks(filepath),
+        "parse_trackdata": lambda: module.BLOCKPARSERS["TrackData"]("TrackData", block, 1),
+        "transform_trackdata": lambda: common.transform_trackdata(
+            trackdata, module.columnmapping, version
+        ),
+        "parse": lambda: detl.parse(filepath),
+        "get_closest_data": lambda: reactor.get_closest_data(points),
+        "get_narrow_data": lambda: data.get_narrow_data(),
+    }
+
+
+def run(
+    sizes: List[int], versions: List[str], n_reactors: int, repeat: int, workdir: pathlib.Path
+) -> List[dict]:
+    """Runs the benchmarks.
+
+    Args:
+        sizes (list): numbers of trackdata rows per reactor
+        versions (list): DASware versions of the exports ("v4", "v5")
+        n_reactors (int): number of reactors per export
+        repeat (int): number of repetitions per stage
+        workdir (pathlib.Path): directory of the synthetic exports
+
+    Returns:
+        records (list): one dictionary per version, size and stage
+    """
+    records = []
+    for version in versions:
+        for size in sizes:
+            filepath = workdir / f"synthetic_{version}_{n_reactors}x{size}.csv"
+            if not filepath.exists():
+                print(f"Writing {filepath}")
+                synthetic.write_export(
+                    filepath, version=version, n_rows=size, n_reactors=n_reactors
+                )
+            for stage, func in stages(filepath).items():
+                seconds = best_of(func, repeat)
+                records.append(
+                    dict(
+                        version=version,
+                        rows=size,
+                        reactors=n_reactors,
+                        nbytes=filepath.stat().st_size,
+                        stage=stage,
+                        seconds=seconds,
+                    )
+                )
+                print(f"{version} {size:>9} rows  {stage:<20} {seconds * 1000:>10.1f} ms")
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000, 1_000_000],
+        help="numbers of trackdata rows per reactor",
+    )
+    parser.add_argument("--versions", nargs="+", default=["v4", "v5"], choices=["v4", "v5"])
+    parser.add_argument("--reactors", type=int, default=4, help="number of reactors per export")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions per stage")
+    parser.add_argument("--workdir", type=pathlib.Path, help="directory of the synthetic exports")
+    parser.add_argument("--output", type=pathlib.Path, help="JSON file to write the results to")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or pathlib.Path(tempfile.gettempdir()) / "detl-benchmarks"
+    workdir.mkdir(parents=True, exist_ok=True)
+    records = run(args.sizes, args.versions, args.reactors, args.repeat, workdir)
+    if args.output:
+        result = dict(
+            detl=detl.__version__,
+            pandas=pandas.__version__,
+            numpy=numpy.__version__,
+            python=platform.python_version(),
+            machine=platform.machine(),
+            records=records,
+        )
+        args.output.write_text(json.dumps(result, indent=2))
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Writes synthetic DASware 4 and 5 raw data exports for benchmarking.
+
+The exports have the block layout of real files: the "FngArchiv" version line,
+one "[TrackData<N>]" block per reactor with "Unit N.*" column names, sparse
+(only changed values logged) signals with DASware's number format, the
+inoculation time column, events and the per-reactor metadata blocks.
+"""
+
+import csv
+import datetime
+import pathlib
+
+import numpy
+import pandas
+
+MAGIC_TIME = datetime.datetime(1899, 12, 30)
+START = datetime.datetime(2019, 2, 6, 10, 46, 52)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# (column name, initial value, step size of the random walk) of the signals by version
+SIGNALS = {
+    "v4": [
+        ("Unit {r}.V{r}.PV [mL]", 1000, 1.0),
+        ("Unit {r}.pH{r}.SP [pH]", 7, 0.0),
+        ("Unit {r}.pH{r}.PV [pH]", 7, 0.01),
+        ("Unit {r}.pH{r}.Out []", 0, 0.1),
+        ("Unit {r}.DO{r}.SP [%DO]", 30, 0.0),
+        ("Unit {r}.DO{r}.PV [%DO]", 80, 1.0),
+        ("Unit {r}.DO{r}.Out [%]", 0, 0.5),
+        ("Unit {r}.T{r}.SP [\xb0C]", 37, 0.0),
+        ("Unit {r}.T{r}.PV [\xb0C]", 37, 0.05),
+        ("Unit {r}.T{r}.Out [%]", 5, 0.2),
+        ("Unit {r}.N{r}.SP [rpm]", 200, 0.0),
+        ("Unit {r}.N{r}.PV [rpm]", 200, 2.0),
+        ("Unit {r}.Torque{r}.PV [mNm]", 10, 0.1),
+        ("Unit {r}.F{r}.SP [sL/h]", 48, 0.0),
+        ("Unit {r}.F{r}.PV [sL/h]", 48, 0.1),
+        ("Unit {r}.F{r}.Out [sL/h]", 45, 0.5),
+        ("Unit {r}.XO2 {r}.Out [%]", 20.5, 0.02),
+        ("Unit {r}.XCO2 {r}.Out [%]", 0.5, 0.01),
+        ("Unit {r}.OTR{r} [mM/h]", 10, 0.5),
+        ("Unit {r}.CTR{r} [mM/h]", 10, 0.5),
+        ("Unit {r}.RQ{r} []", 1, 0.01),
+        ("Unit {r}.AU{r} []", 0, 0.0),
+        ("Unit {r}.CX{r} []", 0, 0.0),
+        ("Unit {r}.FA{r}.SP [mL/h]", 0, 0.0),
+        ("Unit {r}.FA{r}.PV [mL/h]", 1, 0.05),
+        ("Unit {r}.VA{r}.PV [mL]", 0, 0.01),
+        ("Unit {r}.FB{r}.SP [mL/h]", 0, 0.0),
+        ("Unit {r}.FB{r}.PV [mL/h]", 1, 0.05),
+        ("Unit {r}.VB{r}.PV [mL]", 0, 0.01),
+        ("Unit {r}.FC{r}.PV [mL/h]", 0, 0.0),
+        ("Unit {r}.VC{r}.PV [mL]", 0, 0.0),
+        ("Unit {r}.FD{r}.PV [mL/h]", 0, 0.0),
+        ("Unit {r}.VD{r}.PV [mL]", 0, 0.0),
+        ("Unit {r}.Level{r}.PV [\xb5S]", 25, 0.5),
+        ("Unit {r}.Offline{r}.A []", 0, 0.0),
+        ("Unit {r}.Offline{r}.B []", 0, 0.0),
+    ],
+    "v5": [
+        ("Unit {r}.V{r}.VPV [mL]", 1000, 1.0),
+        ("Unit {r}.pH{r}.SP [pH]", 7, 0.0),
+        ("Unit {r}.pH{r}.PV [pH]", 7, 0.01),
+        ("Unit {r}.pH{r}.Out []", 0, 0.1),
+        ("Unit {r}.DO{r}.SP [%DO]", 30, 0.0),
+        ("Unit {r}.DO{r}.PV [%DO]", 80, 1.0),
+        ("Unit {r}.DO{r}.Out [%]", 0, 0.5),
+        ("Unit {r}.T{r}.SP [\xb0C]", 37, 0.0),
+        ("Unit {r}.T{r}.PV [\xb0C]", 37, 0.05),
+        ("Unit {r}.T{r}.Out [%]", 5, 0.2),
+        ("Unit {r}.N{r}.SP [rpm]", 200, 0.0),
+        ("Unit {r}.N{r}.PV [rpm]", 200, 2.0),
+        ("Unit {r}.N{r}.TStirPV [mNm]", 10, 0.1),
+        ("Unit {r}.F{r}.SP [sL/h]", 48, 0.0),
+        ("Unit {r}.F{r}.PV [sL/h]", 48, 0.1),
+        ("Unit {r}.F{r}.Out [sL/h]", 45, 0.5),
+        ("Unit {r}.FAir{r}.PV [sL/h]", 40, 0.1),
+        ("Unit {r}.FO2{r}.PV [sL/h]", 5, 0.1),
+        ("Unit {r}.XO2{r}.PV [%]", 21, 0.02),
+        ("Unit {r}.XCO2{r}.PV [%]", 0.04, 0.001),
+        ("Unit {r}.XO2{r}.Out [%]", 20.5, 0.02),
+        ("Unit {r}.XCO2{r}.Out [%]", 0.5, 0.01),
+        ("Unit {r}.OTR{r} [mM/h]", 10, 0.5),
+        ("Unit {r}.CTR{r} [mM/h]", 10, 0.5),
+        ("Unit {r}.RQ{r} []", 1, 0.01),
+        ("Unit {r}.FA{r}.SP [mL/h]", 0, 0.0),
+        ("Unit {r}.FA{r}.PV [mL/h]", 1, 0.05),
+        ("Unit {r}.VA{r}.PV [mL]", 0, 0.01),
+        ("Unit {r}.FB{r}.SP [mL/h]", 0, 0.0),
+        ("Unit {r}.FB{r}.PV [mL/h]", 1, 0.05),
+        ("Unit {r}.VB{r}.PV [mL]", 0, 0.01),
+        ("Unit {r}.ODAU{r}.PV []", 0, 0.0),
+        ("Unit {r}.Lvl{r}.PV [\xb5S]", 25, 0.5),
+        ("Unit {r}.OfflineA{r}.OfflineA []", 0, 0.0),
+        ("Unit {r}.LoopA{r}.PV []", 0, 0.0),
+    ],
+}
+
+FNGARCHIV = {"v4": "4.0.1", "v5": "5.0.0"}
+INOCULATION = {"v4": "Unit {r}.Inoculation Time []", "v5": "Unit {r}.InoculationTime []"}
+
+
+def format_numbers(values: numpy.ndarray) -> numpy.ndarray:
+    """Formats values like DASware does: 3 decimals, leading space, no leading zero.
+
+    For example 1000.126 becomes " 1000.126", 0.5 becomes " .5" and -0.25 becomes "-.25".
+    """
+    milli = numpy.round(values * 1000).astype(numpy.int64)
+    digits = numpy.strings.zfill(numpy.abs(milli).astype(str), 4)
+    integer = numpy.strings.slice(digits, 0, -3)
+    integer = numpy.where(integer == "0", "", integer)
+    fraction = numpy.strings.rstrip(numpy.strings.slice(digits, -3, None), "0")
+    fraction = numpy.where(fraction == "", "", numpy.strings.add(".", fraction))
+    number = numpy.strings.add(integer, fraction)
+    number = numpy.where(number == "", "0", number)
+    sign = numpy.where(milli < 0, "-", " ")
+    return numpy.strings.add(sign, number).astype(object)
+
+
+def trackdata_block(
+    rng: numpy.random.Generator,
+    version: str,
+    reactor: int,
+    n_rows: int,
+    n_columns: int,
+    inoculation_row: int,
+) -> pandas.DataFrame:
+    """Creates the cells of a "[TrackData<N>]" block as strings.
+
+    Args:
+        rng (numpy.random.Generator): random number generator
+        version (str): "v4" or "v5"
+        reactor (int): number of the reactor
+        n_rows (int): number of rows
+        n_columns (int): number of signal columns
+        inoculation_row (int): row at which the time since inoculation starts counting
+
+    Returns:
+        cells (pandas.DataFrame): quoted header as column names, formatted cells as values
+    """
+    signals = SIGNALS[version][:n_columns]
+    minutes = numpy.arange(n_rows)
+    cells = {}
+
+    timestamps = pandas.Timestamp(START) + pandas.to_timedelta(minutes, unit="min")
+    cells["Timestamp"] = timestamps.strftime(TIMESTAMP_FORMAT).to_numpy(dtype=object)
+    cells["Duration"] = numpy.strings.add(" ", ((minutes + 1) * 60 / 86400).astype(str))
+
+    # DASware logs the time since inoculation every few minutes, and zeros before inoculation
+    since = pandas.Timestamp(MAGIC_TIME) + pandas.to_timedelta(
+        minutes - inoculation_row + 1, unit="min"
+    )
+    inoculation = since.strftime(TIMESTAMP_FORMAT).to_numpy(dtype=object)
+    inoculation[:inoculation_row] = '""'
+    inoculation[: min(2, inoculation_row)] = "1899-12-30 00:00:00"
+    unlogged = (minutes >= inoculation_row) & (minutes % 10 != 0)
+    unlogged[inoculation_row : inoculation_row + 1] = False
+    inoculation[unlogged] = '""'
+    cells[INOCULATION[version].format(r=reactor)] = inoculation
+
+    for name, base, step in signals:
+        values = base + numpy.cumsum(rng.normal(size=n_rows) * step)
+        text = format_numbers(values)
+        # only changed values are logged, so most cells of a row are empty
+        logged = rng.random(size=n_rows) < 0.6
+        logged[0] = True
+        text[~logged] = '""'
+        cells[name.format(r=reactor)] = text
+    return pandas.DataFrame({f'"{k}"': v for k, v in cells.items()})
+
+
+def write_export(
+    filepath,
+    *,
+    version: str = "v4",
+    n_rows: int = 1000,
+    n_reactors: int = 4,
+    n_columns: int = None,
+    seed: int = 0,
+    newline: str = "\n",
+) -> pathlib.Path:
+    """Writes a synthetic DASware export.
+
+    Args:
+        filepath (str or pathlib.Path): path of the file to write
+        version (str): "v4" or "v5"
+        n_rows (int): number of trackdata rows per reactor
+            (every second reactor has one row less, like in real exports)
+        n_reactors (int): number of reactors
+        n_columns (int or None): number of signal columns per reactor (None for all)
+        seed (int): seed of the random signals
+        newline (str): line separator, for example "\\r\\n" like exports written on Windows
+
+    Returns:
+        filepath (pathlib.Path): path of the written file
+    """
+    rng = numpy.random.default_rng(seed)
+    n_columns = len(SIGNALS[version]) if n_columns is None else n_columns
+    stamp = START.strftime(TIMESTAMP_FORMAT)
+
+    head = [
+        '"[Info]"',
+        '"Product";"Version";"Host";"Timestamp";"Author";"Connection";"Application"',
+        f'"FngArchiv";"{FNGARCHIV[version]}";"HOST";{stamp};"Manager";"HOST";"Control"',
+        '"DASGIP Control Core";"4.6.8"',
+        "",
+        '"[CoreInfo]"',
+        '"Product";"Version";"Host";"Option1"',
+        '"DASGIP Control Core";"4.6.8";"HOST"',
+        '"TimezoneBias";-60',
+        "",
+        '"[ProjectInfo]"',
+        '"ProjName";"FullName";"State";"StartTimestamp";"StopTimestamp"',
+        f'"Synthetic.Control";"\\Synthetic.Control";1;{stamp};{stamp}',
+        "",
+        '"[TrackData]"',
+        "",
+    ]
+    tail = ["", '"[Events]"', '"No";"Timestamp";"Description";"Reference";"Resource"']
+    for i in range(20):
+        timestamp = START + datetime.timedelta(minutes=n_rows * i / 20)
+        tail.append(
+            f'{i + 1};{timestamp:{TIMESTAMP_FORMAT}};"Event {i + 1}";"";"Unit {i % n_reactors + 1}"'
+        )
+    tail += ['"[End]"', "123456", ""]
+    tail += ['"[Fb-Pro]"', '"Product";"Version"', '"DASGIP Control";"4.6.28"', ""]
+    tail += ['"[Plant]"', '"Identifier";"Comment";"Host"', '"DASGIP Plant";"";"HOST"', ""]
+    tail += ['"[Units]"', '"Identifier";"Comment";"Reactor"']
+    tail += [f'"Unit {r}";"";"SR1000ODLS"' for r in range(1, n_reactors + 1)]
+    tail += ["", '"[Setups]"', '"Count"', str(n_reactors)]
+    for r in range(1, n_reactors + 1):
+        tail += [
+            "",
+            f'"[Setup{r}]"',
+            '"Identifier";"Comment";"State"',
+            f'"Synthetic.Control.Setup {r}";"";4',
+            "",
+            '"[Unit]"',
+            '"Identifier";"Reactor";"V-Min";"V-Max"',
+            f'"Unit {r}";"SR1000ODLS";"500 mL";"1500 mL"',
+            "",
+            '"[Requirements]"',
+            '"Identifier";"Parameter 1"',
+            '"Reactor";"Mode=Continuous "',
+            "",
+            '"[Sensor Elements]"',
+            '"Identifier";"Comment"',
+            '"pH-Sensor";""',
+            "",
+            '"[Device Channels]"',
+            '"Identifier";"Channel"',
+            '"Pump A";"1"',
+            "",
+            '"[Profiles]"',
+            '"Identifier";"Comment"',
+            '"Feed";""',
+        ]
+    tail += ["", '"[/Fb-Pro]"', ""]
+
+    filepath = pathlib.Path(filepath)
+    with filepath.open("w", encoding="latin-1", newline=newline) as file:
+        file.write("\n".join(head) + "\n")
+        for r in range(1, n_reactors + 1):
+            cells = trackdata_block(
+                rng, version, r, n_rows - (r - 1) % 2, n_columns, inoculation_row=n_rows // 5
+            )
+            file.write(f'"[TrackData{r}]"\n')
+            cells.to_csv(file, sep=";", index=False, quoting=csv.QUOTE_NONE, quotechar="\x00")
+            file.write("\n")
+        file.write("\n".join(tail))
+    return filepath
@@ -1,7 +1,18 @@
+import asyncio
+import codecs
+import concurrent.futures
+import contextlib
+import functools
 import importlib.metadata
+import pathlib
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
 
-from . import parsing
-from .core import DASwareParser, DASwareVersion, DWData
+from . import parsing, profiling
+from .cache import ParseCache
+from .catalog import Catalog
+from .core import AlignedData, DASwareParser, DASwareVersion, DWData, WindowData
+from .incremental import IncrementalParser, iter_trackdata
+from .profiling import ParseProfile
 
 __version__ = importlib.metadata.version(__package__ or __name__)
 
@@ -11,26 +22,37 @@ parsers = {
 }
 
 
-def get_parser(filepath) -> DASwareParser:
-    """Analyzes a raw DASware CSV file and selects an appropiate parser.
+# the version is identified from the third line, which is well within this many bytes
+SNIFF_BYTES = 512
+
+
+def sniff(filepath) -> Tuple[DASwareVersion, str]:
+    """Identifies the DASware version and text encoding of a raw DASware CSV file.
+
+    Only the first few hundred bytes of the file are read to identify the version.
+    If they are plain ASCII, the encoding can't be told from them, and the entire file
+    is checked for UTF-8 instead. Files that are not valid UTF-8 are read as latin-1.
 
     Args:
         filepath (str or pathlib.Path): path pointing to the file of interest
 
     Returns:
-        DWDParser: a parser that can be used for the provided file type
+        version (DASwareVersion): DASware version of the file
+        encoding (str): text encoding to read the file with
 
     Raises:
         NotImlementedError: when the file contents do not match with a known DASware CSV style
     """
+    with open(filepath, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        text = codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        encoding = "utf-8"
     except UnicodeDecodeError:
-        with open(filepath, "r", encoding="latin-1") as f:
-            lines = f.readlines()
-
-    version = None
+        text = head.decode("latin-1")
+        encoding = "latin-1"
+    lines = text.splitlines()
 
     if len(lines) > 2 and lines[2].startswith('"FngArchiv";"4.0.1"'):
         version = DASwareVersion.V4
@@ -39,12 +61,59 @@ def get_parser(filepath) -> DASwareParser:
     else:
         raise NotImplementedError("Unsupported file version")
 
+    if head.isascii() and not parsing.common.is_utf8(filepath):
+        encoding = "latin-1"
+    return version, encoding
+
+
+def get_parser(filepath) -> DASwareParser:
+    """Analyzes a raw DASware CSV file and selects an appropiate parser.
+
+    Args:
+        filepath (str or pathlib.Path): path pointing to the file of interest
+
+    Returns:
+        DWDParser: a parser that can be used for the provided file type
+
+    Raises:
+        NotImlementedError: when the file contents do not match with a known DASware CSV style
+    """
+    version, _ = sniff(filepath)
+
     # select a parser for this version
     parser_cls = parsers[version]
     return parser_cls()
 
 
-def parse(filepath, *, inoculation_times: dict = None) -> DWData:
+def _cache_key(cache, filepath, inoculation_times, reactors, columns, compact, keep_trackdata):
+    """Opens a cache (if given as a directory) and computes the key of a `parse` call."""
+    if not isinstance(cache, ParseCache):
+        cache = ParseCache(cache)
+    key = cache.key(
+        filepath,
+        inoculation_times=sorted((inoculation_times or {}).items()),
+        reactors=None if reactors is None else sorted(reactors),
+        columns=None if columns is None else list(columns),
+        compact=compact,
+        keep_trackdata=keep_trackdata,
+    )
+    return cache, key
+
+
+def parse(
+    filepath,
+    *,
+    inoculation_times: dict = None,
+    n_jobs: int = 1,
+    lazy: bool = False,
+    reactors=None,
+    columns=None,
+    compact: bool = False,
+    cache=None,
+    profile=False,
+    keep_trackdata: bool = True,
+    engine: str = "c",
+) -> DWData:
     """Parses a raw DASware CSV file into a DWData object.
 
     Args:
@@ -52,6 +121,107 @@ def parse(filepath, *, inoculation_times: dict = None) -> DWData:
         inoculation_times (dict or None): optional overrides for inoculation timepoints
             key (int): reactor number
             value (datetime.datetime): timezone-aware datetime object of the real inoculation time (computer clock!)
+            They can be changed later with `DWData.set_inoculation_times` without parsing again.
+        n_jobs (int): number of threads that parse and transform the reactors concurrently
+        lazy (bool): if True, blocks are parsed only when the corresponding property is first accessed
+        reactors (iterable or None): numbers of the reactors to parse (None parses all)
+        columns (iterable or None): names from the version's `columnmapping` to include in the
+            reactor dataframes, in addition to the time columns (None includes all)
+        compact (bool): if True, signals are stored as float32 where that preserves their
+            3 decimals. The memory saved per reactor is logged at INFO level.
+        cache (ParseCache, str, pathlib.Path or None): optional cache (or cache directory)
+            that stores the parse result and returns it when the same file is parsed again.
+            The entries are pickles, so the directory must be private to the user.
+        profile (bool or ParseProfile): if True (or a `ParseProfile`), the wall time, size and peak
+            memory of the parsing stages are recorded. The profile is attached to the result
+            as `DWData.parse_profile`.
+        keep_trackdata (bool): if False, the raw trackdata of each reactor is freed once its
+            dataframe was created, which roughly halves the memory of the result.
+            `ReactorData.trackdata` then parses it again from the file on access,
+            and the file stays memory-mapped. Pickled results (for example cache hits) map
+            the file again, and raise a `RuntimeError` if it changed in the meantime.
+        engine (str): CSV engine for the trackdata blocks
+            "c": one `pandas.read_csv` call per block
+            "threaded": large blocks are read in pieces on all CPU cores, with identical results
+
+    Returns:
+        DWData: parsed data object
+
+    Raises:
+        NotImlementedError: when the file contents do not match with a known DASware CSV style
+    """
+    if profile is True:
+        profile = ParseProfile()
+    elif profile is False:
+        profile = None
+
+    with profiling.stage(profile, "parse") as record:
+        record["nbytes"] = pathlib.Path(filepath).stat().st_size
+        if cache is not None:
+            cache, key = _cache_key(
+                cache, filepath, inoculation_times, reactors, columns, compact, keep_trackdata
+            )
+            with profiling.stage(profile, "cache_load"):
+                data = cache.load(key)
+            if data is not None:
+                data._parse_profile = profile
+                return data
+
+        with profiling.stage(profile, "sniff") as sniff_record:
+            version, encoding = sniff(filepath)
+            sniff_record["nbytes"] = SNIFF_BYTES
+        parser = parsers[version]()
+        data = parser.parse(
+            filepath,
+            encoding=encoding,
+            n_jobs=n_jobs,
+            lazy=lazy,
+            reactors=reactors,
+            columns=columns,
+            compact=compact,
+            profile=profile,
+            keep_trackdata=keep_trackdata,
+            engine=engine,
+        )
+
+        if inoculation_times:
+            data.set_inoculation_times(inoculation_times)
+
+        if cache is not None:
+            with profiling.stage(profile, "cache_store"):
+                cache.store(key, data)
+        data._parse_profile = profile
+    return data
+
+
+async def parse_async(
+    filepath,
+    *,
+    executor: Optional[concurrent.futures.Executor] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    inoculation_times: dict = None,
+    lazy: bool = False,
+    cache=None,
+    profile=False,
+    **kwargs,
+) -> DWData:
+    """Parses a raw DASware CSV file into a DWData object without blocking the event loop.
+
+    All file access and parsing runs on the `executor`, with one job per reactor
+    (see `DASwareParser.parse_async`). Cancelling the coroutine cancels the jobs
+    that did not start yet.
+
+    Args:
+        filepath (str or pathlib.Path): path pointing to the file of interest
+        executor (concurrent.futures.Executor or None): executor to run the parsing jobs on
+            (None uses the default executor of the event loop)
+        semaphore (asyncio.Semaphore or None): limits how many files are parsed at the same time,
+            when it is shared between the calls. Calls wait for a free slot before reading the file.
+        inoculation_times (dict or None): optional overrides for inoculation timepoints (see `parse`)
+        lazy (bool): if True, blocks are parsed only when the corresponding property is first accessed
+        cache (ParseCache, str, pathlib.Path or None): optional cache (see `parse`)
+        profile (bool or ParseProfile): if True (or a `ParseProfile`), the parsing stages are recorded
+        **kwargs: further arguments of `parse`, like `reactors`, `columns` or `compact`
 
     Returns:
         DWData: parsed data object
@@ -59,15 +229,114 @@ def parse(filepath, *, inoculation_times: dict = None) -> DWData:
     Raises:
         NotImlementedError: when the file contents do not match with a known DASware CSV style
     """
-    parser = get_parser(filepath)
-    data = parser.parse(filepath)
+    if profile is True:
+        profile = ParseProfile()
+    elif profile is False:
+        profile = None
+    loop = asyncio.get_running_loop()
 
-    if inoculation_times:
-        for r, dt_inoculate in inoculation_times.items():
-            new_process_time = (
-                data[r].dataframe["timestamp"] - dt_inoculate
-            ).dt.total_seconds() / 3600
-            new_process_time[new_process_time < 0] = float("nan")
-            data[r].dataframe["process_time"] = new_process_time
+    def run(func, *args, **kwargs):
+        return loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
 
+    async with semaphore or contextlib.nullcontext():
+        with profiling.stage(profile, "parse") as record:
+            record["nbytes"] = (await run(pathlib.Path(filepath).stat)).st_size
+            if cache is not None:
+                cache, key = _cache_key(
+                    cache,
+                    filepath,
+                    inoculation_times,
+                    kwargs.get("reactors"),
+                    kwargs.get("columns"),
+                    kwargs.get("compact", False),
+                    kwargs.get("keep_trackdata", True),
+                )
+                with profiling.stage(profile, "cache_load"):
+                    data = await run(cache.load, key)
+                if data is not None:
+                    data._parse_profile = profile
+                    return data
+
+            with profiling.stage(profile, "sniff") as sniff_record:
+                version, encoding = await run(sniff, filepath)
+                sniff_record["nbytes"] = SNIFF_BYTES
+            parser = parsers[version]()
+            data = await parser.parse_async(
+                filepath, executor=executor, encoding=encoding, lazy=lazy, profile=profile, **kwargs
+            )
+
+            if inoculation_times:
+                data.set_inoculation_times(inoculation_times)
+            if cache is not None:
+                with profiling.stage(profile, "cache_store"):
+                    await run(cache.store, key, data)
+            data._parse_profile = profile
     return data
+
+
+def iparse_many(
+    filepaths: Iterable, *, max_workers: Optional[int] = None, inoculation_times: dict = None
+) -> Iterator[Tuple[object, Union[DWData, Exception]]]:
+    """Parses many raw DASware CSV files on a process pool, yielding results as they finish.
+
+    Args:
+        filepaths (iterable): paths pointing to the files of interest
+        max_workers (int or None): number of worker processes (defaults to the number of CPUs).
+            With ``max_workers=1`` the files are parsed one after another in this process.
+        inoculation_times (dict or None): optional inoculation time overrides per file
+            key: one of the `filepaths`
+            value (dict): `inoculation_times` argument for the `parse` call of that file
+
+    Yields:
+        filepath: the path as it was passed in `filepaths`
+        result (DWData or Exception): parsed data object, or the exception raised while parsing
+    """
+    filepaths = list(filepaths)
+    inoculation_times = inoculation_times or {}
+
+    if max_workers == 1:
+        for filepath in filepaths:
+            try:
+                yield filepath, parse(filepath, inoculation_times=inoculation_times.get(filepath))
+            except Exception as ex:
+                yield filepath, ex
+        return
+
+    pool = concurrent.futures.ProcessPoolExecutor(max_workers)
+    try:
+        futures = {
+            pool.submit(
+                parse, filepath, inoculation_times=inoculation_times.get(filepath)
+            ): filepath
+            for filepath in filepaths
+        }
+        for future in concurrent.futures.as_completed(futures):
+            ex = future.exception()
+            yield futures[future], future.result() if ex is None else ex
+    finally:
+        # don't start the remaining files if the consumer stopped early
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def parse_many(
+    filepaths: Iterable, *, max_workers: Optional[int] = None, inoculation_times: dict = None
+) -> Dict[object, Union[DWData, Exception]]:
+    """Parses many raw DASware CSV files on a process pool.
+
+    Files that fail to parse do not stop the batch. Their entry in the result is the exception.
+
+    Args:
+        filepaths (iterable): paths pointing to the files of interest
+        max_workers (int or None): number of worker processes (defaults to the number of CPUs)
+        inoculation_times (dict or None): optional inoculation time overrides per file
+            key: one of the `filepaths`
+            value (dict): `inoculation_times` argument for the `parse` call of that file
+
+    Returns:
+        results (dict): maps each of the `filepaths` (in the given order) to its DWData or exception
+    """
+    filepaths = list(filepaths)
+    results = dict(
+        iparse_many(filepaths, max_workers=max_workers, inoculation_times=inoculation_times)
+    )
+    return {filepath: results[filepath] for filepath in filepaths}
@@ -0,0 +1,167 @@
+"""Persistent on-disk cache of parsed DASware files."""
+
+import hashlib
+import importlib.metadata
+import json
+import logging
+import os
+import pathlib
+import pickle
+import stat as stat_module
+import tempfile
+from typing import Optional
+
+from .core import DWData
+
+logger = logging.getLogger("detl.cache")
+
+# cache entries of a different detl version are never used
+_DETL_VERSION = importlib.metadata.version("detl")
+_SUFFIX = ".pkl"
+
+
+class ParseCache(object):
+    """Stores parsed `DWData` objects in a directory, bounded in size by LRU eviction.
+
+    Entries are keyed by the file (its size and modification time, or its content hash),
+    the detl version and the options that change the parse result.
+
+    The entries are pickles, and loading a pickle can run arbitrary code.
+    The cache directory must therefore be private to the user: anyone who can write to it
+    can run code in every process that parses through the cache. A warning is logged when
+    the directory is writable by other users.
+    """
+
+    def __init__(self, directory, *, max_bytes: Optional[int] = 2 * 1024**3, key: str = "stat"):
+        """Creates a cache in the given directory.
+
+        Args:
+            directory (str or pathlib.Path): directory of the cache entries (created if needed)
+            max_bytes (int or None): total size of the entries that is kept (None for unbounded)
+            key (str): how files are identified
+                "stat": by absolute path, size and modification time (cheap)
+                "content": by a SHA-256 of the file contents (survives copies and moves)
+
+        Raises:
+            ValueError: when `key` is neither "stat" nor "content"
+        """
+        if not key in {"stat", "content"}:
+            raise ValueError(f"Invalid key '{key}'. Must be 'stat' or 'content'.")
+        self.directory = pathlib.Path(directory).expanduser()
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if _writable_by_others(self.directory):
+            logger.warning(
+                "The cache directory %s is writable by other users, who could make this "
+                "process run arbitrary code through its entries. Use a private directory.",
+                self.directory,
+            )
+        self.max_bytes = max_bytes
+        self.key_method = key
+
+    def key(self, filepath, **options) -> str:
+        """Computes the key of a cache entry.
+
+        Args:
+            filepath (str or pathlib.Path): path pointing to the DASware CSV file
+            **options: options of the `detl.parse` call that change its result
+
+        Returns:
+            key (str): hexadecimal digest that identifies the entry
+        """
+        filepath = pathlib.Path(filepath)
+        if self.key_method == "content":
+            with open(filepath, "rb") as f:
+                identity = hashlib.file_digest(f, "sha256").hexdigest()
+        else:
+            stat = filepath.stat()
+            identity = [str(filepath.resolve()), stat.st_size, stat.st_mtime_ns]
+        fingerprint = json.dumps(
+            [_DETL_VERSION, identity, {k: repr(v) for k, v in sorted(options.items())}]
+        )
+        return hashlib.sha256(fingerprint.encode()).hexdigest()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.directory / (key + _SUFFIX)
+
+    def load(self, key: str) -> Optional[DWData]:
+        """Loads an entry from the cache.
+
+        Args:
+            key (str): key of the entry
+
+        Returns:
+            data (DWData or None): the cached object, or None if there is no (valid) entry
+        """
+        fp = self._path(key)
+        try:
+            with open(fp, "rb") as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning("Dropping unreadable cache entry %s", fp, exc_info=True)
+            fp.unlink(missing_ok=True)
+            return None
+        # the modification time marks the entry as recently used
+        os.utime(fp)
+        return data
+
+    def store(self, key: str, data: DWData):
+        """Writes an entry to the cache and evicts the least recently used entries.
+
+        Args:
+            key (str): key of the entry
+            data (DWData): parsed data (pending tables are loaded before writing)
+        """
+        # writing to a temporary file first prevents concurrent readers from seeing partial entries
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, protocol=5)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.evict()
+        return
+
+    def evict(self):
+        """Deletes the least recently used entries until the cache fits into `max_bytes`."""
+        if self.max_bytes is None:
+            return
+        entries = []
+        for fp in self.directory.glob("*" + _SUFFIX):
+            try:
+                stat = fp.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, fp))
+        total = sum(size for _, size, _ in entries)
+        for _, size, fp in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            fp.unlink(missing_ok=True)
+            total -= size
+            logger.debug("Evicted cache entry %s", fp)
+        return
+
+    def clear(self):
+        """Deletes all entries."""
+        for fp in self.directory.glob("*" + _SUFFIX):
+            fp.unlink(missing_ok=True)
+        return
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the entries in bytes."""
+        return sum(fp.stat().st_size for fp in self.directory.glob("*" + _SUFFIX))
+
+
+def _writable_by_others(directory: pathlib.Path) -> bool:
+    """Checks whether users other than the current one can create files in a directory."""
+    if os.name != "posix":
+        return False
+    stat = directory.stat()
+    return stat.st_uid != os.getuid() or bool(
+        stat.st_mode & (stat_module.S_IWGRP | stat_module.S_IWOTH)
+    )
@@ -0,0 +1,371 @@
+"""Queryable index of many DASware exports in a local SQLite database."""
+
+import datetime
+import logging
+import os
+import pathlib
+import sqlite3
+from typing import Iterable, List, Optional
+
+import pandas
+
+from .core import DASwareVersion, DWData
+from .parsing import common, dw4, dw5, utils
+
+logger = logging.getLogger("detl.catalog")
+
+_COLUMNMAPPINGS = {
+    DASwareVersion.V4: dw4.columnmapping,
+    DASwareVersion.V5: dw5.columnmapping,
+}
+# size of the pieces in which the lines of trackdata blocks are counted
+_CHUNK_BYTES = 4 * 1024**2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    version TEXT,
+    encoding TEXT,
+    project TEXT,
+    start TEXT,
+    stop TEXT,
+    n_reactors INTEGER,
+    coreinfo TEXT,
+    projectinfo TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS reactors (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    reactor INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    start TEXT,
+    stop TEXT,
+    PRIMARY KEY (path, reactor)
+);
+CREATE TABLE IF NOT EXISTS columns (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    reactor INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (path, reactor, name)
+);
+CREATE INDEX IF NOT EXISTS columns_name ON columns(name);
+"""
+
+
+def _isoformat(dwtimestamp: str) -> str:
+    """Converts a DASware timestamp to a sortable ISO 8601 string (UTC)."""
+    return utils.dwtimestamp_to_utc(dwtimestamp.strip().strip('"')).isoformat(sep=" ")
+
+
+def _to_json(df: pandas.DataFrame) -> str:
+    return df.to_json(orient="records", date_format="iso")
+
+
+def _time_span(block: common.Block) -> tuple:
+    """Reads the number of data rows and the first and last timestamp of a trackdata block.
+
+    Only the first and last line of the block are decoded, and the lines are counted in chunks.
+    """
+    buffer = block._buffer
+    header_stop = buffer.find(b"\n", block.start, block.stop) + 1
+    if header_stop <= 0 or header_stop >= block.stop:
+        return 0, None, None
+    rows = 1
+    with block.open() as f:
+        f.readline()
+        for chunk in iter(lambda: f.read(_CHUNK_BYTES), b""):
+            rows += chunk.count(b"\n")
+    first_stop = buffer.find(b"\n", header_stop, block.stop)
+    first = buffer[header_stop : block.stop if first_stop < 0 else first_stop]
+    last = buffer[buffer.rfind(b"\n", header_stop, block.stop) + 1 or header_stop : block.stop]
+    start, stop = (
+        _isoformat(str(line.split(b";", 1)[0], block.encoding, errors="replace"))
+        for line in (first, last)
+    )
+    return rows, start, stop
+
+
+def index_file(filepath) -> dict:
+    """Extracts the catalog information of one export without parsing its trackdata.
+
+    Args:
+        filepath (str or pathlib.Path): path pointing to the DASware CSV file
+
+    Returns:
+        entry (dict): with the keys
+            version (str), encoding (str), project (str or None), start (str or None),
+            stop (str or None), coreinfo (str), projectinfo (str): JSON records of the tables
+            reactors (list): (reactor, rows, start, stop, columns) per reactor with trackdata,
+            where `columns` are the names from the version's `columnmapping` in its header
+
+    Raises:
+        NotImlementedError: when the file contents do not match with a known DASware CSV style
+    """
+    from . import sniff
+
+    version, encoding = sniff(filepath)
+    scoped_blocks = common.index_blocks(filepath, encoding)
+    blocks = scoped_blocks.get(None, {})
+    coreinfo = common.read_block(blocks["CoreInfo"]) if "CoreInfo" in blocks else None
+    projectinfo = common.read_block(blocks["ProjectInfo"]) if "ProjectInfo" in blocks else None
+
+    mapping = tuple(_COLUMNMAPPINGS[version].items())
+    reactors = []
+    for scope, blocks in scoped_blocks.items():
+        if scope is None or not "TrackData" in blocks:
+            continue
+        block = blocks["TrackData"]
+        header = common.read_block(block, nrows=0).columns
+        _, resolved = common.resolve_columns(
+            tuple(header), common.INOCULATION_TIME_PATTERNS[version], mapping
+        )
+        rows, start, stop = _time_span(block)
+        reactors.append((scope, rows, start, stop, [name for name, _ in resolved]))
+
+    starts = [r[2] for r in reactors if r[2] is not None]
+    stops = [r[3] for r in reactors if r[3] is not None]
+    project = None
+    if projectinfo is not None and "ProjName" in projectinfo and len(projectinfo):
+        project = str(projectinfo["ProjName"].iloc[0])
+    return dict(
+        version=version.value,
+        encoding=encoding,
+        project=project,
+        start=min(starts) if starts else None,
+        stop=max(stops) if stops else None,
+        coreinfo=None if coreinfo is None else _to_json(coreinfo),
+        projectinfo=None if projectinfo is None else _to_json(projectinfo),
+        reactors=reactors,
+    )
+
+
+class Catalog(object):
+    """Index of the version, metadata, reactors, columns and time spans of DASware exports.
+
+    The index is built by `scan`, which reads only the metadata blocks and the first and last
+    line of each trackdata block, so it is much cheaper than parsing the files.
+    Rescans skip files whose size and modification time did not change.
+
+    The database has three tables that can also be queried with SQL (see `query`):
+        files: path, size, mtime_ns, version, encoding, project, start, stop, n_reactors,
+            coreinfo and projectinfo (JSON records), error (of files that could not be indexed)
+        reactors: path, reactor, rows, start, stop
+        columns: path, reactor, name (from the version's `columnmapping`)
+
+    Times are ISO 8601 strings in UTC, such that they compare in chronological order.
+    """
+
+    def __init__(self, database):
+        """Opens (or creates) a catalog.
+
+        Args:
+            database (str or pathlib.Path): path of the SQLite database file
+        """
+        self.database = pathlib.Path(database).expanduser()
+        self._connection = sqlite3.connect(self.database)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        """Closes the database connection."""
+        self._connection.close()
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return
+
+    def scan(
+        self, directory, *, pattern: str = "*.csv", recursive: bool = True, prune: bool = True
+    ) -> dict:
+        """Indexes the exports in a directory.
+
+        Files that can't be indexed are recorded with their error, such that they are
+        skipped by later scans until they change.
+
+        Args:
+            directory (str or pathlib.Path): directory to search for exports
+            pattern (str): glob pattern of the file names
+            recursive (bool): if True, subdirectories are searched as well
+            prune (bool): if True, entries of files below `directory` that no longer exist
+                are removed
+
+        Returns:
+            counts (dict): numbers of "added", "updated", "unchanged", "failed" and "removed" files
+        """
+        directory = pathlib.Path(directory).expanduser().resolve()
+        filepaths = directory.rglob(pattern) if recursive else directory.glob(pattern)
+        known = {
+            path: (size, mtime_ns)
+            for path, size, mtime_ns in self._connection.execute(
+                "SELECT path, size, mtime_ns FROM files"
+            )
+        }
+        counts = dict(added=0, updated=0, unchanged=0, failed=0, removed=0)
+        seen = set()
+        for fp in sorted(filepaths):
+            if not fp.is_file():
+                continue
+            path = str(fp)
+            seen.add(path)
+            stat = fp.stat()
+            if known.get(path) == (stat.st_size, stat.st_mtime_ns):
+                counts["unchanged"] += 1
+                continue
+            try:
+                entry = index_file(fp)
+                error = None
+            except Exception as ex:
+                logger.warning("Failed to index %s: %s", fp, ex)
+                entry = None
+                error = f"{type(ex).__name__}: {ex}"
+            with self._connection:
+                self._store(path, stat, entry, error)
+            if error is not None:
+                counts["failed"] += 1
+            elif path in known:
+                counts["updated"] += 1
+            else:
+                counts["added"] += 1
+
+        if prune:
+            prefix = os.path.join(str(directory), "")
+            removed = [p for p in known if p.startswith(prefix) and not p in seen]
+            with self._connection:
+                self._connection.executemany(
+                    "DELETE FROM files WHERE path = ?", [(p,) for p in removed]
+                )
+            counts["removed"] = len(removed)
+        logger.info("Scanned %s: %s", directory, counts)
+        return counts
+
+    def _store(self, path: str, stat: os.stat_result, entry: Optional[dict], error: Optional[str]):
+        execute = self._connection.execute
+        execute("DELETE FROM files WHERE path = ?", (path,))
+        entry = entry or dict(reactors=[])
+        execute(
+            "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                path,
+                stat.st_size,
+                stat.st_mtime_ns,
+                entry.get("version"),
+                entry.get("encoding"),
+                entry.get("project"),
+                entry.get("start"),
+                entry.get("stop"),
+                len(entry["reactors"]),
+                entry.get("coreinfo"),
+                entry.get("projectinfo"),
+                error,
+            ),
+        )
+        for reactor, rows, start, stop, columns in entry["reactors"]:
+            execute(
+                "INSERT INTO reactors VALUES (?, ?, ?, ?, ?)", (path, reactor, rows, start, stop)
+            )
+            self._connection.executemany(
+                "INSERT INTO columns VALUES (?, ?, ?)", [(path, reactor, c) for c in columns]
+            )
+        return
+
+    def find(
+        self,
+        *,
+        version=None,
+        reactor: Optional[int] = None,
+        columns: Optional[Iterable[str]] = None,
+        start: Optional[datetime.datetime] = None,
+        stop: Optional[datetime.datetime] = None,
+        project: Optional[str] = None,
+    ) -> List[str]:
+        """Finds the exports that match all of the given criteria.
+
+        Args:
+            version (DASwareVersion, str or None): DASware version, for example "v5"
+            reactor (int or None): reactor number that must have trackdata
+            columns (iterable or None): names from the version's `columnmapping` that
+                must all be in the trackdata of the same reactor
+            start (datetime or None): timezone-aware begin of a time span that must overlap
+                with the trackdata of that reactor
+            stop (datetime or None): timezone-aware end of that time span
+            project (str or None): SQL LIKE pattern of the project name, for example "%Cryo%"
+
+        Returns:
+            paths (list): absolute paths of the matching files, in alphabetical order
+        """
+        conditions = ["f.error IS NULL"]
+        params = []
+        if version is not None:
+            conditions.append("f.version = ?")
+            params.append(DASwareVersion(version).value)
+        if project is not None:
+            conditions.append("f.project LIKE ?")
+            params.append(project)
+
+        reactor_conditions = []
+        if reactor is not None:
+            reactor_conditions.append("r.reactor = ?")
+            params.append(int(reactor))
+        if start is not None:
+            reactor_conditions.append("r.stop >= ?")
+            params.append(_utc_isoformat(start))
+        if stop is not None:
+            reactor_conditions.append("r.start <= ?")
+            params.append(_utc_isoformat(stop))
+        for name in columns or ():
+            reactor_conditions.append(
+                "EXISTS (SELECT 1 FROM columns c"
+                " WHERE c.path = r.path AND c.reactor = r.reactor AND c.name = ?)"
+            )
+            params.append(name)
+        if reactor_conditions:
+            conditions.append(
+                "EXISTS (SELECT 1 FROM reactors r WHERE r.path = f.path AND "
+                + " AND ".join(reactor_conditions)
+                + ")"
+            )
+
+        sql = "SELECT f.path FROM files f WHERE " + " AND ".join(conditions) + " ORDER BY f.path"
+        return [path for (path,) in self._connection.execute(sql, params)]
+
+    def query(self, sql: str, params=()) -> pandas.DataFrame:
+        """Runs an SQL query against the catalog tables.
+
+        Args:
+            sql (str): SELECT statement
+            params (sequence or dict): parameters of the statement
+
+        Returns:
+            result (pandas.DataFrame): the selected rows
+        """
+        return pandas.read_sql_query(sql, self._connection, params=params)
+
+    def open(self, path, **kwargs) -> DWData:
+        """Parses an export lazily, such that its blocks are only parsed when accessed.
+
+        Args:
+            path (str or pathlib.Path): path of the file, for example from `find`
+            **kwargs: further arguments of `detl.parse`
+
+        Returns:
+            data (DWData): parsed data object
+        """
+        from . import parse
+
+        kwargs.setdefault("lazy", True)
+        return parse(path, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"Catalog({str(self.database)!r})"
+
+
+def _utc_isoformat(dt: datetime.datetime) -> str:
+    if dt.tzinfo is None:
+        raise ValueError("The times must be timezone-aware.")
+    return dt.astimezone(datetime.timezone.utc).isoformat(sep=" ")
@@ -1,23 +1,130 @@
 """Specifies the base types for parsing and representing DASware data."""
 
 import abc
+import asyncio
+import concurrent.futures
+import contextlib
 import enum
+import functools
 import pathlib
-from typing import Dict
+import threading
+from typing import Callable, Dict, Optional, Tuple
 
 import numpy
 import pandas
 
+from .profiling import ParseProfile
+
 
 class DASwareVersion(enum.Enum):
     V4 = "v4"
     V5 = "v5"
 
 
-class ReactorData(object):
+class LazyTables(object):
+    """Base type for data structures whose tables can be loaded on first access."""
+
+    # attributes holding caches that are reset instead of pickled
+    _transient: Tuple[str, ...] = ()
+
+    def __init__(self):
+        self._pending = {}
+        self._reloaders = {}
+        self._lock = threading.RLock()
+
+    def _defer(self, attr: str, loader: Callable[[], pandas.DataFrame]):
+        """Registers a function that loads the table of an attribute when it is first accessed.
+
+        Args:
+            attr (str): name of the private attribute, for example "_events"
+            loader (callable): function that returns the table (or None)
+        """
+        self._pending[attr] = loader
+        return
+
+    def _get(self, attr: str):
+        """Returns the value of a private attribute, loading it first if it is still pending."""
+        if attr in self._pending:
+            with self._lock:
+                loader = self._pending.pop(attr, None)
+                if loader is not None:
+                    setattr(self, attr, loader())
+        return getattr(self, attr)
+
+    def _reloadable(self, attr: str, loader: Callable[[], pandas.DataFrame]):
+        """Registers a function that loads the table of an attribute again after `_release`.
+
+        Args:
+            attr (str): name of the private attribute, for example "_trackdata"
+            loader (callable): function that returns the table (or None)
+        """
+        self._reloaders[attr] = loader
+        return
+
+    def _release(self, attr: str) -> bool:
+        """Frees the table of a reloadable attribute, deferring it until it is accessed again.
+
+        Args:
+            attr (str): name of the private attribute
+
+        Returns:
+            released (bool): False if the attribute has no loader to load it again
+        """
+        loader = self._reloaders.get(attr)
+        if loader is None:
+            return False
+        with self._lock:
+            setattr(self, attr, None)
+            self._pending[attr] = loader
+        return True
+
+    @property
+    def pending(self) -> Tuple[str, ...]:
+        """Names of the attributes that were not loaded yet."""
+        return tuple(self._pending)
+
+    def load(self):
+        """Loads all pending tables."""
+        for attr in list(self._pending):
+            self._get(attr)
+        return
+
+    def __getstate__(self):
+        # pending loaders reference the memory-mapped file, so tables are loaded before pickling.
+        # Released tables are left out instead of being loaded again, but their loaders are kept,
+        # such that they can be loaded from the file after unpickling.
+        for attr in list(self._pending):
+            if not attr in self._reloaders:
+                self._get(attr)
+        state = self.__dict__.copy()
+        for attr in self._pending:
+            state[attr] = None
+        state["_released"] = {attr: self._reloaders[attr] for attr in self._pending}
+        del state["_pending"]
+        del state["_reloaders"]
+        del state["_lock"]
+        for attr in self._transient:
+            state.pop(attr, None)
+        return state
+
+    def __setstate__(self, state):
+        released = state.pop("_released", {})
+        self.__dict__.update(state)
+        self._pending = dict(released)
+        self._reloaders = dict(released)
+        self._lock = threading.RLock()
+        for attr in self._transient:
+            setattr(self, attr, {})
+        return
+
+
+class ReactorData(LazyTables):
     """Data structure containing data from one reactor."""
 
+    _transient = ("_sorted_indices",)
+
     def __init__(self, id: int):
+        super().__init__()
         self._id = id
         self._setup = None
         self._unit = None
@@ -27,6 +134,13 @@ class ReactorData(object):
         self._profiles = None
         self._trackdata = None
         self._dataframe = None
+        self._sorted_indices = {}
+        # override of the inoculation time (None for the process time of the export)
+        self._inoculation_time = None
+        # the exported process time, kept to restore it after an override
+        self._exported_process_time = None
+        # whether the process time of the dataframe must be recomputed on the next access
+        self._process_time_stale = False
 
     @property
     def id(self) -> int:
@@ -36,48 +150,271 @@ class ReactorData(object):
     @property
     def setup(self) -> pandas.DataFrame:
         """Dataframe of overall process information."""
-        return self._setup
+        return self._get("_setup")
 
     @property
     def unit(self) -> pandas.DataFrame:
         """Properties of the reactor."""
-        return self._unit
+        return self._get("_unit")
 
     @property
     def requirements(self) -> pandas.DataFrame:
-        return self._requirements
+        return self._get("_requirements")
 
     @property
     def sensor_elements(self) -> pandas.DataFrame:
         """Table of connected sensors."""
-        return self._sensor_elements
+        return self._get("_sensor_elements")
 
     @property
     def device_channels(self) -> pandas.DataFrame:
-        return self._device_channels
+        return self._get("_device_channels")
 
     @property
     def profiles(self) -> pandas.DataFrame:
-        return self._profiles
+        return self._get("_profiles")
 
     @property
     def trackdata(self) -> pandas.DataFrame:
-        """Contains timeseries of mass flows."""
-        return self._trackdata
+        """Contains timeseries of mass flows.
+
+        When parsed with ``keep_trackdata=False``, it is parsed again from the file when accessed.
+        This also works after pickling, as long as the file did not change (otherwise
+        a `RuntimeError` is raised).
+        """
+        return self._get("_trackdata")
 
     @property
     def dataframe(self) -> pandas.DataFrame:
-        """Primary table of setpoint (SP) and actual (PV) control parameters."""
-        return self._dataframe
+        """Primary table of setpoint (SP) and actual (PV) control parameters.
+
+        It may be edited in-place. The sort orders that `window` and `get_closest_data` cache
+        are checked against the column values, and sorted again when they changed.
+        """
+        df = self._get("_dataframe")
+        if self._process_time_stale and df is not None:
+            with self._lock:
+                if self._process_time_stale:
+                    self._update_process_time(df)
+        return df
+
+    @property
+    def inoculation_time(self) -> Optional[pandas.Timestamp]:
+        """Override of the inoculation time, or None when the exported process time is used."""
+        return self._inoculation_time
+
+    def set_inoculation_time(self, inoculation_time=None):
+        """Sets the reference of the process time.
+
+        The process time is recomputed from the timestamps when the dataframe is accessed next.
+        Rows before the inoculation get a NaN process time.
+
+        Args:
+            inoculation_time (datetime or None): timezone-aware inoculation time (computer clock!),
+                or None to restore the process time of the export
+
+        Raises:
+            ValueError: when the inoculation time is not timezone-aware
+        """
+        if inoculation_time is not None:
+            inoculation_time = pandas.Timestamp(inoculation_time)
+            if inoculation_time.tzinfo is None:
+                raise ValueError("The inoculation time must be timezone-aware.")
+        with self._lock:
+            self._inoculation_time = inoculation_time
+            self._process_time_stale = True
+        return
+
+    def _replace_dataframe(self, df: pandas.DataFrame):
+        """Replaces the dataframe by one with the exported process time.
+
+        The override of the inoculation time (if any) is applied to it on the next access.
+
+        Args:
+            df (pandas.DataFrame): the new dataframe, with the process time as exported
+        """
+        with self._lock:
+            self._dataframe = df
+            self._exported_process_time = None
+            self._process_time_stale = self._inoculation_time is not None
+            self._sorted_indices.pop("process_time", None)
+        return
+
+    def _update_process_time(self, df: pandas.DataFrame):
+        """Replaces the process time column of the dataframe according to the inoculation time."""
+        if self._exported_process_time is None:
+            self._exported_process_time = df["process_time"]
+        if self._inoculation_time is None:
+            process_time = self._exported_process_time
+        else:
+            timestamps = df["timestamp"].array
+            unit = timestamps.unit
+            reference = self._inoculation_time.as_unit(unit).asm8.view(numpy.int64)
+            seconds = (timestamps.asi8 - reference) / (
+                numpy.timedelta64(1, "s") // numpy.timedelta64(1, unit)
+            )
+            process_time = seconds / 3600
+            process_time[(seconds < 0) | timestamps.isna()] = numpy.nan
+        # the column is replaced, which also invalidates its sorted index
+        df["process_time"] = process_time
+        self._sorted_indices.pop("process_time", None)
+        self._process_time_stale = False
+        return
+
+    def _sorted_index(self, reference: str) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Returns the sorted non-missing values of a dataframe column and their positions.
+
+        The sort order is cached per column, together with a copy of the column values.
+        It is reused as long as the column holds the same values, which is checked on every call,
+        so in-place edits of the dataframe are picked up.
+
+        Args:
+            reference (str): name of the column
+
+        Returns:
+            keys (numpy.ndarray): sorted values (int64 for datetime columns, float otherwise)
+            positions (numpy.ndarray): positions of the `keys` in the dataframe. Equal values
+                are ordered by their position.
+
+        Raises:
+            KeyError: when the reference column is not in the DataFrame
+        """
+        if reference not in self.dataframe.columns:
+            raise KeyError("Reference column not in DataFrame")
+        column = self.dataframe[reference]
+        is_datetime = pandas.api.types.is_datetime64_any_dtype(column)
+        values = column.array.asi8 if is_datetime else column.to_numpy(dtype=float)
+
+        cached = self._sorted_indices.get(reference)
+        # bitwise comparison, which is faster than sorting again and treats equal NaNs as equal
+        if cached is not None and numpy.array_equal(
+            cached[0].view(numpy.int64), values.view(numpy.int64)
+        ):
+            return cached[1], cached[2]
+
+        if is_datetime:
+            valid = values != numpy.iinfo(numpy.int64).min
+        else:
+            valid = ~numpy.isnan(values)
+        positions = numpy.flatnonzero(valid)
+        keys = values[positions]
+        ordered = not numpy.any(keys[1:] < keys[:-1])
+        if not ordered:
+            order = numpy.argsort(keys, kind="stable")
+            keys = keys[order]
+            positions = positions[order]
+        self._sorted_indices[reference] = (values.copy(), keys, positions, ordered)
+        return keys, positions
+
+    def _query_keys(self, points, reference: str) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Converts points to the type of the keys of `_sorted_index`.
+
+        Returns:
+            queries (numpy.ndarray): the points as int64 (datetime columns) or float
+            missing (numpy.ndarray): mask of the points that are NaN or NaT
+        """
+        column = self.dataframe[reference]
+        if pandas.api.types.is_datetime64_any_dtype(column):
+            times = pandas.DatetimeIndex(pandas.to_datetime(points, utc=column.dt.tz is not None))
+            return times.as_unit(column.dt.unit).asi8, numpy.asarray(times.isna())
+        queries = numpy.asarray(points, dtype=float)
+        return queries, numpy.isnan(queries)
+
+    def _closest_positions(
+        self, points, reference: str = "process_time", tolerance=None
+    ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Finds the rows closest to the given points.
+
+        Returns:
+            matched (numpy.ndarray): indices of the `points` that were matched
+            positions (numpy.ndarray): positions of the closest rows in the dataframe
+        """
+        keys, positions = self._sorted_index(reference)
+        if len(keys) == 0:
+            raise ValueError(f"The reference column '{reference}' has no values.")
+        queries, missing = self._query_keys(points, reference)
+        column = self.dataframe[reference]
+        if tolerance is not None and pandas.api.types.is_datetime64_any_dtype(column):
+            tolerance = pandas.Timedelta(tolerance).as_unit(column.dt.unit).value
+        matched = numpy.flatnonzero(~missing)
+        queries = queries[matched]
+
+        # the candidates are the neighbors in the sorted values, each at the first position of its value
+        right = numpy.searchsorted(keys, queries, side="left")
+        left = numpy.searchsorted(keys, keys[numpy.clip(right - 1, 0, None)], side="left")
+        right = numpy.clip(right, None, len(keys) - 1)
+        distance_left = numpy.abs(queries - keys[left])
+        distance_right = numpy.abs(keys[right] - queries)
+        # ties are resolved towards the row that comes first
+        take_right = (distance_right < distance_left) | (
+            (distance_right == distance_left) & (positions[right] < positions[left])
+        )
+        closest = numpy.where(take_right, right, left)
+
+        if tolerance is not None:
+            within = numpy.where(take_right, distance_right, distance_left) <= tolerance
+            matched = matched[within]
+            closest = closest[within]
+        return matched, positions[closest]
+
+    def _window_positions(self, start, end, kdim: str):
+        """Finds the rows whose `kdim` value is within [start, end].
+
+        Returns:
+            rows (slice or numpy.ndarray): a slice when the rows are consecutive
+                (the usual case of a time column in chronological order), otherwise their positions
+        """
+        keys, positions = self._sorted_index(kdim)
+        queries, missing = self._query_keys([start, end], kdim)
+        lo = 0 if missing[0] else numpy.searchsorted(keys, queries[0], side="left")
+        hi = len(keys) if missing[1] else numpy.searchsorted(keys, queries[1], side="right")
+        if hi <= lo:
+            return slice(0, 0)
+        ordered = self._sorted_indices[kdim][3]
+        first, last = positions[lo], positions[hi - 1]
+        if ordered and last - first == hi - lo - 1:
+            return slice(first, last + 1)
+        return numpy.sort(positions[lo:hi])
+
+    def window(self, start=None, end=None, kdim: str = "process_time") -> pandas.DataFrame:
+        """Returns the rows of the dataframe within a time window.
+
+        The rows are looked up by binary search in the cached sort order of the `kdim` column,
+        so repeated queries don't sort the dataframe again.
+        In-place edits of the `kdim` column are taken into account.
+        For a column in chronological order, the result is a slice of the dataframe.
+
+        Args:
+            start (float, datetime, str or None): first value of `kdim` in the window
+                (None for no lower bound)
+            end (float, datetime, str or None): last value of `kdim` in the window
+                (None for no upper bound)
+            kdim (str): name of the time axis: 'timestamp', 'duration', or 'process_time'.
+                Rows with missing values in this column are left out.
+
+        Returns:
+            window (pandas.DataFrame): rows with ``start <= kdim <= end`` in their original order
+
+        Raises:
+            KeyError: when the kdim column is not in the DataFrame
+        """
+        return self.dataframe.iloc[self._window_positions(start, end, kdim)]
 
     def get_closest_data(
-        self, points: numpy.array, reference: str = "process_time"
+        self, points: numpy.array, reference: str = "process_time", *, tolerance=None
     ) -> pandas.DataFrame:
         """Returns a subset of the reactor data at points closest to the given ones.
 
+        Missing values in the reference column are ignored.
+        If two rows are equally close to a point, the first one is returned.
+        The sort order of the reference column is cached, and the cache is checked against
+        the column values on every call, so in-place edits of the dataframe are taken into account.
+
         Args:
             points (numpy.array): the data from readings closest to these points will be returned
             reference (str): name of the column to look for points
+            tolerance (float, datetime.timedelta or None): maximum distance of a reading to a point.
+                Points without readings within this distance (and NaN points) are left out.
 
         Returns:
             filtered_data: DataFrame containing data closest to the given points
@@ -85,18 +422,69 @@ class ReactorData(object):
         Raises:
             KeyError: when the reference column is not in the DataFrame
         """
-        if reference not in self.dataframe.columns:
-            raise KeyError("Reference column not in DataFrame")
-
-        idx = [abs(self.dataframe.loc[:, reference] - p).idxmin() for p in points]
+        _, positions = self._closest_positions(points, reference, tolerance)
+        return self.dataframe.iloc[positions]
 
-        return self.dataframe.loc[idx]
+    def _aligned_values(
+        self, grid, columns, kdim: str = "process_time", method: str = "linear"
+    ) -> numpy.ndarray:
+        """Samples columns of the dataframe at the points of a grid.
 
+        Args:
+            grid (array-like): points of the `kdim` column
+            columns (list): names of the columns to sample (missing columns give NaN)
+            kdim (str): name of the time axis
+            method (str): "linear" interpolates between the neighboring rows,
+                "asof" takes the last row at or before each point
 
-class DWData(Dict[str, ReactorData]):
+        Returns:
+            values (numpy.ndarray): (len(grid), len(columns)) array of sampled values,
+                NaN outside of the time span of the reactor
+        """
+        queries, missing = self._query_keys(grid, kdim)
+        keys, positions = self._sorted_index(kdim)
+        if len(keys) == 0:
+            return numpy.full((len(queries), len(columns)), numpy.nan)
+
+        # last row at or before each point, and the row after it
+        left = numpy.searchsorted(keys, queries, side="right") - 1
+        valid = (left >= 0) & ~missing
+        left = numpy.clip(left, 0, None)
+        right = numpy.clip(left + 1, None, len(keys) - 1)
+
+        # only the rows next to the points are read from the dataframe
+        n = len(queries)
+        rows = positions[numpy.concatenate([left, right])]
+        df = self.dataframe
+        data = numpy.full((2 * n, len(columns)), numpy.nan)
+        present = [c for c in columns if c in df.columns]
+        if present:
+            indices = [columns.index(c) for c in present]
+            data[:, indices] = df[present].iloc[rows].to_numpy(dtype=float)
+        values, following = data[:n], data[n:]
+
+        if method == "linear":
+            exact = keys[left] == queries
+            valid &= exact | (left + 1 < len(keys))
+            span = (keys[right] - keys[left]).astype(float)
+            inside = ~exact & (span > 0)
+            weight = numpy.zeros(n)
+            weight[inside] = (queries[inside] - keys[left[inside]]) / span[inside]
+            values = values + (following - values) * weight[:, None]
+            # exact matches don't depend on the next row
+            values[exact] = data[:n][exact]
+        values[~valid] = numpy.nan
+        return values
+
+
+class DWData(Dict[str, ReactorData], LazyTables):
     """Standardized data type for DASGIP data."""
 
+    _transient = ("_events_index",)
+
     def __init__(self, version: DASwareVersion):
+        super().__init__()
+        LazyTables.__init__(self)
         self._version = version
         self._info = None
         self._coreinfo = None
@@ -113,89 +501,231 @@ class DWData(Dict[str, ReactorData]):
         self._external_servers = None
         self._external_values = None
         self._internal_values = None
+        self._parse_profile = None
+        self._events_index = {}
 
     @property
     def version(self) -> DASwareVersion:
         """Specifies which DASWARE version was used."""
         return self._version
 
+    @property
+    def parse_profile(self) -> Optional[ParseProfile]:
+        """Timing and memory records of the parse (only when parsed with ``profile=True``)."""
+        return self._parse_profile
+
     @property
     def info(self) -> pandas.DataFrame:
         """Contains version numbers of software modules."""
-        return self._info
+        return self._get("_info")
 
     @property
     def coreinfo(self) -> pandas.DataFrame:
         """Information about DASWARE and timezone settings."""
-        return self._coreinfo
+        return self._get("_coreinfo")
 
     @property
     def projectinfo(self) -> pandas.DataFrame:
-        return self._projectinfo
+        return self._get("_projectinfo")
 
     @property
     def tracks(self) -> pandas.DataFrame:
         """Metadata about logging settings."""
-        return self._trackinfo
+        return self._get("_trackinfo")
 
     @property
     def events(self) -> pandas.DataFrame:
         """Table of events that happened during the process."""
-        return self._events
+        return self._get("_events")
 
     @property
     def fb_pro(self) -> pandas.DataFrame:
-        return self._fb_pro
+        return self._get("_fb_pro")
 
     @property
     def procedure(self) -> pandas.DataFrame:
         """Metadata of the experiment"""
-        return self._procedure
+        return self._get("_procedure")
 
     @property
     def profile_columns(self) -> pandas.DataFrame:
-        return self._profile_columns
+        return self._get("_profile_columns")
 
     @property
     def plant(self) -> pandas.DataFrame:
         """Metadata of the hardware"""
-        return self._plant
+        return self._get("_plant")
 
     @property
     def units(self) -> pandas.DataFrame:
         """Metadata of the reactor units"""
-        return self._units
+        return self._get("_units")
 
     @property
     def sensors(self) -> pandas.DataFrame:
         """Metadata of the connected sensors"""
-        return self._sensors
+        return self._get("_sensors")
 
     @property
     def modules(self) -> pandas.DataFrame:
-        return self._modules
+        return self._get("_modules")
 
     @property
     def external_servers(self) -> pandas.DataFrame:
-        return self._external_servers
+        return self._get("_external_servers")
 
     @property
     def external_values(self) -> pandas.DataFrame:
-        return self._external_values
+        return self._get("_external_values")
 
     @property
     def internal_values(self) -> pandas.DataFrame:
-        return self._internal_values
+        return self._get("_internal_values")
+
+    @property
+    def inoculation_times(self) -> Dict[int, Optional[pandas.Timestamp]]:
+        """Overrides of the inoculation times by reactor number (None for the exported ones)."""
+        return {r: reactor.inoculation_time for r, reactor in self.items()}
+
+    def set_inoculation_times(self, inoculation_times: dict):
+        """Sets the references of the process times without parsing again.
+
+        The process times are recomputed from the timestamps when the dataframes are accessed next,
+        so trying many inoculation times only costs one vectorized subtraction per reactor.
+        Sorted indices of the process time (see `window` and `get_closest_data`) are rebuilt.
+
+        Args:
+            inoculation_times (dict): timezone-aware inoculation times (computer clock!)
+                by reactor number. None restores the process time of the export.
+
+        Raises:
+            KeyError: when a reactor is not in the data
+            ValueError: when an inoculation time is not timezone-aware
+        """
+        missing = set(inoculation_times).difference(self)
+        if missing:
+            raise KeyError(f"Reactors {sorted(missing)} are not in the data.")
+        for r, inoculation_time in inoculation_times.items():
+            self[r].set_inoculation_time(inoculation_time)
+        return
+
+    def get_closest_data(
+        self, points, reference: str = "process_time", *, tolerance=None
+    ) -> pandas.DataFrame:
+        """Returns the data of all reactors at points closest to the given ones.
+
+        Args:
+            points (array-like or dict): points to look up in all reactors,
+                or a dictionary that maps reactor numbers to their points
+            reference (str): name of the column to look for points
+            tolerance (float, datetime.timedelta or None): maximum distance of a reading to a point.
+                Points without readings within this distance (and NaN points) are left out.
+
+        Returns:
+            closest_data: DataFrame with the columns "reactor" and "point",
+                followed by the data of the closest readings
+
+        Raises:
+            KeyError: when the reference column is not in the DataFrame of a reactor
+        """
+        if not isinstance(points, dict):
+            points = {reactor_id: points for reactor_id in self}
+        frames = []
+        for reactor_id, reactor_points in points.items():
+            reactor_points = numpy.asarray(reactor_points)
+            matched, positions = self[reactor_id]._closest_positions(
+                reactor_points, reference, tolerance
+            )
+            df = self[reactor_id].dataframe.iloc[positions].reset_index(drop=True)
+            df.insert(0, "point", reactor_points[matched])
+            df.insert(0, "reactor", reactor_id)
+            frames.append(df)
+        return pandas.concat(frames, ignore_index=True)
+
+    def _sorted_events(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Returns the sorted event times (UTC nanoseconds) and their positions in `events`.
+
+        The index is cached with a copy of the timestamps, and reused as long as they are equal.
+        """
+        timestamps = self.events["Timestamp"]
+        cached = self._events_index.get("Timestamp")
+        if cached is not None and cached[0].equals(timestamps):
+            return cached[1], cached[2]
+        from .parsing import utils
+
+        times = pandas.DatetimeIndex(utils.dwtimestamps_to_utc(timestamps))
+        values = times.as_unit("ns").asi8
+        positions = numpy.flatnonzero(~times.isna())
+        order = numpy.argsort(values[positions], kind="stable")
+        keys, positions = values[positions][order], positions[order]
+        self._events_index["Timestamp"] = (timestamps.copy(), keys, positions)
+        return keys, positions
+
+    def _events_between(self, start, end) -> Optional[pandas.DataFrame]:
+        """Returns the events with timestamps within [start, end] (in their original order)."""
+        if self.events is None:
+            return None
+        keys, positions = self._sorted_events()
+        times = pandas.DatetimeIndex(pandas.to_datetime([start, end], utc=True)).as_unit("ns")
+        lo = 0 if pandas.isna(times[0]) else numpy.searchsorted(keys, times[0].value, "left")
+        hi = (
+            len(keys)
+            if pandas.isna(times[1])
+            else numpy.searchsorted(keys, times[1].value, "right")
+        )
+        return self.events.iloc[numpy.sort(positions[lo : max(lo, hi)])]
+
+    def window(self, start=None, end=None, kdim: str = "process_time") -> "WindowData":
+        """Returns the data of all reactors within a time window, with the events in it.
+
+        The reactor rows and the events are looked up by binary search in cached sort orders
+        (see `ReactorData.window`).
+
+        Args:
+            start (float, datetime, str or None): first value of `kdim` in the window
+                (None for no lower bound)
+            end (float, datetime, str or None): last value of `kdim` in the window
+                (None for no upper bound)
+            kdim (str): name of the time axis: 'timestamp', 'duration', or 'process_time'
+
+        Returns:
+            window (WindowData): the rows of each reactor within the window, and the events
+                from the first to the last timestamp of these rows (or between `start` and `end`
+                when `kdim` is 'timestamp')
+
+        Raises:
+            KeyError: when the kdim is not a time axis
+        """
+        if kdim not in {"timestamp", "duration", "process_time"}:
+            raise KeyError("kdim must be 'timestamp', 'duration', or 'process_time'.")
+        frames = {r: reactor.window(start, end, kdim) for r, reactor in self.items()}
+        if kdim == "timestamp":
+            events = self._events_between(start, end)
+        else:
+            # the other time axes increase with the timestamp, so the rows give the time span
+            timestamps = [df["timestamp"] for df in frames.values() if len(df)]
+            if timestamps:
+                first = min(t.min() for t in timestamps)
+                last = max(t.max() for t in timestamps)
+                events = self._events_between(first, last)
+            else:
+                events = None if self.events is None else self.events.iloc[:0]
+        return WindowData(frames, events, start, end, kdim)
 
-    def get_narrow_data(self, kdim: str = "process_time"):
+    def get_narrow_data(self, kdim: str = "process_time", *, dtype=float) -> pandas.DataFrame:
         """Returns all data in a narrow DataFrame.
 
+        The "reactor" and "variable" columns are categorical. The table is assembled in one go from the
+        column-major values of each reactor, without intermediate DataFrames per reactor.
+
         Args:
             kdim (str): name of the time axis which will be the time axis in the new format.
                         Can be 'timestamp', 'duration', or 'process_time'. 'process_time' will
                         drop all data before valid time information is available.
                         'duration' and 'process_time' will drop the timestamp information to get a clean
                         float-type value column.
+            dtype (numpy.dtype): data type of the "value" column, for example `numpy.float32`
+                to halve the memory of very long tables
 
         Returns:
             narrow_data: DataFrame containing all data in a narrow format
@@ -206,31 +736,209 @@ class DWData(Dict[str, ReactorData]):
         if kdim not in {"timestamp", "duration", "process_time"}:
             raise KeyError("kdim must be 'timestamp', 'duration', or 'process_time'.")
 
-        narrow_data = pandas.DataFrame()
-        for reactor_id in self:
+        categories = {}
+        reactor_ids = list(self)
+        reactors, times, codes, values = [], [], [], []
+        time_dtype = None
+        for r, reactor_id in enumerate(reactor_ids):
+            df = self[reactor_id].dataframe
             if kdim == "process_time":
-                _df = (
-                    self[reactor_id]
-                    .dataframe.dropna()
-                    .drop("timestamp", axis="columns")
-                    .melt(id_vars=kdim)
-                )
-            elif kdim == "duration":
-                _df = (
-                    self[reactor_id].dataframe.drop("timestamp", axis="columns").melt(id_vars=kdim)
-                )
-            else:
-                _df = self[reactor_id].dataframe.melt(id_vars=kdim)
+                df = df.dropna()
+            variables = [c for c in df.columns if not c in {kdim, "timestamp"}]
+            for variable in variables:
+                categories.setdefault(variable, len(categories))
+            n = len(df)
+            time = df[kdim]
+            time_dtype = time.dtype
+            reactors.append(numpy.full(n * len(variables), r, dtype=numpy.int16))
+            # `.values` of timezone-aware columns are the UTC datetimes
+            times.append(numpy.tile(time.values, len(variables)))
+            codes.append(numpy.repeat([categories[v] for v in variables], n))
+            values.append(df[variables].to_numpy(dtype=dtype).ravel(order="F"))
+
+        if not reactors:
+            return pandas.DataFrame(columns=["reactor", "time", "variable", "value"])
+
+        time = pandas.Series(numpy.concatenate(times))
+        if isinstance(time_dtype, pandas.DatetimeTZDtype):
+            time = time.dt.tz_localize("UTC").dt.tz_convert(time_dtype.tz)
+        narrow_data = pandas.DataFrame(
+            {
+                "reactor": pandas.Categorical.from_codes(
+                    numpy.concatenate(reactors), categories=reactor_ids
+                ),
+                "time": time,
+                "variable": pandas.Categorical.from_codes(
+                    numpy.concatenate(codes), categories=list(categories)
+                ),
+                "value": numpy.concatenate(values),
+            }
+        )
+        return narrow_data
 
-            _df["reactor"] = reactor_id
-            _df = _df.astype({"value": float})
-            narrow_data = pandas.concat([narrow_data, _df], ignore_index=True)
+    def to_aligned(
+        self, grid, kdim: str = "process_time", columns=None, *, method: str = "linear"
+    ) -> "AlignedData":
+        """Samples the data of all reactors onto a common time grid.
 
-        narrow_data = narrow_data.rename({kdim: "time"}, axis="columns")[
-            ["reactor", "time", "variable", "value"]
-        ]
+        Args:
+            grid (array-like): points of the time axis, for example ``numpy.arange(0, 24, 0.25)``
+            kdim (str): name of the time axis: 'timestamp', 'duration', or 'process_time'
+            columns (iterable or None): names of the columns to sample.
+                Defaults to all numeric columns except the time axes.
+            method (str): "linear" interpolates between the neighboring readings,
+                "asof" takes the last reading at or before each point
 
-        return narrow_data
+        Returns:
+            aligned (AlignedData): reactor x time x variable array with its labels.
+                Points outside of the time span of a reactor, and columns that a
+                reactor doesn't have, are NaN.
+
+        Raises:
+            KeyError: when the kdim is not a time axis
+            ValueError: when the method is unknown
+        """
+        if kdim not in {"timestamp", "duration", "process_time"}:
+            raise KeyError("kdim must be 'timestamp', 'duration', or 'process_time'.")
+        if method not in {"linear", "asof"}:
+            raise ValueError(f"Unknown method '{method}'. Must be 'linear' or 'asof'.")
+        if columns is None:
+            columns = []
+            for reactor in self.values():
+                for c, dtype in reactor.dataframe.dtypes.items():
+                    if pandas.api.types.is_numeric_dtype(dtype) and not c in columns:
+                        columns.append(c)
+            columns = [c for c in columns if not c in {"timestamp", "duration", "process_time"}]
+        columns = list(columns)
+        values = numpy.full((len(self), len(grid), len(columns)), numpy.nan)
+        for r, reactor in enumerate(self.values()):
+            values[r] = reactor._aligned_values(grid, columns, kdim, method)
+        if kdim == "timestamp":
+            grid = pandas.DatetimeIndex(pandas.to_datetime(grid, utc=True))
+        return AlignedData(values, list(self), grid, columns, kdim)
+
+    def to_arrow(self):
+        """Converts the dataframes of all reactors into one Arrow table (requires `pyarrow`).
+
+        Returns:
+            table (pyarrow.Table): the reactor dataframes with a leading "reactor" column
+        """
+        from . import parquet
+
+        return parquet.to_arrow(self)
+
+    def to_parquet(self, directory):
+        """Writes the dataframes and tables to a directory of Parquet files (requires `pyarrow`).
+
+        The dataframes are partitioned by reactor (see `detl.parquet` for the layout).
+
+        Args:
+            directory (str or pathlib.Path): directory to write to (created if needed)
+        """
+        from . import parquet
+
+        return parquet.to_parquet(self, directory)
+
+    @classmethod
+    def from_parquet(cls, directory, *, reactors=None, columns=None) -> "DWData":
+        """Loads a data object that was written with `to_parquet` (requires `pyarrow`).
+
+        The tables are read when they are first accessed.
+
+        Args:
+            directory (str or pathlib.Path): directory that was written by `to_parquet`
+            reactors (iterable or None): numbers of the reactors to load (None loads all)
+            columns (iterable or None): names of the dataframe columns to read, in addition to
+                the time columns (None reads all)
+
+        Returns:
+            data (DWData): data object without raw trackdata
+        """
+        from . import parquet
+
+        return parquet.from_parquet(directory, reactors=reactors, columns=columns)
+
+
+class AlignedData(object):
+    """Data of several reactors sampled onto a common time grid (see `DWData.to_aligned`)."""
+
+    def __init__(self, values: numpy.ndarray, reactors: list, grid, variables: list, kdim: str):
+        """Creates an aligned data object.
+
+        Args:
+            values (numpy.ndarray): (reactor, time, variable) array
+            reactors (list): reactor numbers along the first axis
+            grid (array-like): points of the time axis along the second axis
+            variables (list): column names along the third axis
+            kdim (str): name of the time axis
+        """
+        self.values = values
+        self.reactors = list(reactors)
+        self.grid = grid
+        self.variables = list(variables)
+        self.kdim = kdim
+
+    def __repr__(self) -> str:
+        return (
+            f"AlignedData({len(self.reactors)} reactors x {len(self.grid)} {self.kdim} "
+            f"x {len(self.variables)} variables)"
+        )
+
+    def get(self, variable: str) -> pandas.DataFrame:
+        """Returns one variable as a table with the grid as index and the reactors as columns.
+
+        Args:
+            variable (str): name of the variable
+
+        Returns:
+            df (pandas.DataFrame): values of the variable
+
+        Raises:
+            KeyError: when the variable was not aligned
+        """
+        if not variable in self.variables:
+            raise KeyError(f"Variable '{variable}' was not aligned.")
+        v = self.variables.index(variable)
+        return pandas.DataFrame(
+            self.values[:, :, v].T,
+            index=pandas.Index(self.grid, name=self.kdim),
+            columns=pandas.Index(self.reactors, name="reactor"),
+        )
+
+    def to_dataframe(self) -> pandas.DataFrame:
+        """Returns the values in a table with a (reactor, kdim) index and one column per variable."""
+        index = pandas.MultiIndex.from_product(
+            [self.reactors, self.grid], names=["reactor", self.kdim]
+        )
+        return pandas.DataFrame(
+            self.values.reshape(-1, len(self.variables)), index=index, columns=self.variables
+        )
+
+
+class WindowData(Dict[int, pandas.DataFrame]):
+    """Rows of several reactors within a time window, by reactor number (see `DWData.window`)."""
+
+    def __init__(self, frames: dict, events: Optional[pandas.DataFrame], start, end, kdim: str):
+        """Creates a window.
+
+        Args:
+            frames (dict): rows of the reactor dataframes within the window, by reactor number
+            events (pandas.DataFrame or None): events that happened during the window
+            start: first value of the time axis in the window (or None)
+            end: last value of the time axis in the window (or None)
+            kdim (str): name of the time axis
+        """
+        super().__init__(frames)
+        self.events = events
+        self.start = start
+        self.end = end
+        self.kdim = kdim
+
+    def __repr__(self) -> str:
+        return (
+            f"WindowData({self.kdim} from {self.start} to {self.end}, "
+            f"{len(self)} reactors, {0 if self.events is None else len(self.events)} events)"
+        )
 
 
 class DASwareParser(object):
@@ -239,12 +947,77 @@ class DASwareParser(object):
     __metaclass__ = abc.ABCMeta
 
     @abc.abstractmethod
-    def parse(self, filepath: pathlib.Path) -> DWData:
+    def parse(
+        self,
+        filepath: pathlib.Path,
+        *,
+        encoding: str = "utf-8",
+        n_jobs: int = 1,
+        lazy: bool = False,
+        reactors=None,
+        columns=None,
+        compact: bool = False,
+        profile: Optional[ParseProfile] = None,
+        keep_trackdata: bool = True,
+        engine: str = "c",
+    ) -> DWData:
         """Parses the provided DASware CSV file into a data object.
 
         Args:
             filepath (str or pathlib.Path): path pointing to the file of interest
+            encoding (str): text encoding of the file
+            n_jobs (int): number of threads that parse and transform the reactors concurrently
+            lazy (bool): if True, tables are only parsed when they are first accessed
+            reactors (iterable or None): numbers of the reactors to parse (None parses all)
+            columns (iterable or None): names of the dataframe columns to parse (None parses all)
+            compact (bool): if True, the dataframe signals are stored with compact dtypes
+            profile (ParseProfile or None): records the timing and memory of the parsing stages
+            keep_trackdata (bool): if False, the raw trackdata is only held while it is needed
+            engine (str): CSV engine for the trackdata blocks
         """
         raise NotImplementedError(
             "Whoever implemented {} screwed up.".format(self.__class__.__name__)
         )
+
+    async def parse_async(
+        self,
+        filepath: pathlib.Path,
+        *,
+        executor: Optional[concurrent.futures.Executor] = None,
+        semaphore: Optional[asyncio.Semaphore] = None,
+        lazy: bool = False,
+        **kwargs,
+    ) -> DWData:
+        """Parses the provided DASware CSV file without blocking the event loop.
+
+        The file is indexed on the `executor`, and then the trackdata of every reactor is
+        parsed and transformed as a separate job, so the reactors are processed concurrently.
+        When the coroutine is cancelled, jobs that did not start yet are cancelled as well.
+        Jobs that are already running can't be interrupted and finish in the background.
+
+        Args:
+            filepath (str or pathlib.Path): path pointing to the file of interest
+            executor (concurrent.futures.Executor or None): executor to run the parsing jobs on
+                (None uses the default executor of the event loop)
+            semaphore (asyncio.Semaphore or None): limits how many files are parsed at the same
+                time, when it is shared between the calls
+            lazy (bool): if True, only the file is indexed and the tables are parsed on first access
+                (in the thread that accesses them)
+            **kwargs: further arguments of `parse`
+
+        Returns:
+            data (DWData): parsed data object
+        """
+        loop = asyncio.get_running_loop()
+        async with semaphore or contextlib.nullcontext():
+            data = await loop.run_in_executor(
+                executor, functools.partial(self.parse, filepath, lazy=True, **kwargs)
+            )
+            if not lazy:
+                await asyncio.gather(
+                    *(
+                        loop.run_in_executor(executor, tables.load)
+                        for tables in [data, *data.values()]
+                    )
+                )
+        return data
@@ -0,0 +1,224 @@
+"""Incremental parsing of DASware exports that are still growing or too large to load at once."""
+
+import logging
+import pathlib
+from typing import Dict, Iterator, Optional
+
+import pandas
+
+from . import core
+from .parsing import common, dw4, dw5
+
+logger = logging.getLogger("detl.incremental")
+
+# parser, block parsers and column mapping by DASware version
+_FORMATS = {
+    core.DASwareVersion.V4: (dw4.DASware4Parser, dw4.BLOCKPARSERS, dw4.columnmapping),
+    core.DASwareVersion.V5: (dw5.DASware5Parser, dw5.BLOCKPARSERS, dw5.columnmapping),
+}
+
+# number of bytes before the resume offset that must be unchanged for the rows to be reused
+ANCHOR_BYTES = 256
+
+
+class _TrackState(object):
+    """Remembers how much of the trackdata block of a reactor was already parsed."""
+
+    def __init__(self, header: bytes, offset: int, anchor: bytes):
+        # header line of the trackdata table
+        self.header = header
+        # offset of the last parsed row, relative to the start of the block
+        self.offset = offset
+        # bytes right before `offset`
+        self.anchor = anchor
+
+
+class IncrementalParser(object):
+    """Keeps the parse result of a DASware export up to date while new trackdata rows are appended.
+
+    The first `refresh` parses the entire file. Subsequent calls only read the trackdata rows
+    that were added since, and append them to the reactors' `trackdata` and `dataframe`.
+    The last row of each reactor is parsed again, because it may have been incomplete and
+    determines the start of the process time.
+    Other tables are kept from the first parse.
+    When the file changed in any other way, it is parsed again entirely.
+    """
+
+    def __init__(self, filepath, *, reactors=None, columns=None):
+        """Creates an incremental parser for a file.
+
+        Args:
+            filepath (str or pathlib.Path): path pointing to the file of interest
+            reactors (iterable or None): numbers of the reactors to parse (None parses all)
+            columns (iterable or None): names from the version's `columnmapping` to include in the
+                reactor dataframes, in addition to the time columns (None includes all)
+        """
+        self.filepath = pathlib.Path(filepath)
+        self.reactors = None if reactors is None else list(reactors)
+        self.columns = None if columns is None else list(columns)
+        self.data: Optional[core.DWData] = None
+        self._encoding = None
+        self._mapping = None
+        self._blockparser = None
+        self._states: Dict[int, _TrackState] = {}
+
+    def refresh(self) -> core.DWData:
+        """Parses the rows that were added to the file since the last refresh.
+
+        Returns:
+            data (DWData): the up-to-date data object (the same object as in previous calls,
+                unless the file had to be parsed again entirely)
+        """
+        if self.data is None:
+            return self._parse_all()
+
+        scoped_blocks = common.index_blocks(self.filepath, self._encoding)
+        if set(self.data).difference(scoped_blocks):
+            logger.info("Reactors of %s changed. Parsing it again.", self.filepath)
+            return self._parse_all()
+
+        updates = {}
+        for r, reactor in self.data.items():
+            block = scoped_blocks[r].get("TrackData")
+            state = self._states.get(r)
+            if block is None or state is None or not self._continues(block, state):
+                logger.info("Trackdata of reactor %i changed. Parsing it again.", r)
+                return self._parse_all()
+            updates[r] = block
+
+        for r, block in updates.items():
+            self._append(self.data[r], block, self._states[r])
+        return self.data
+
+    def _parse_all(self) -> core.DWData:
+        version, self._encoding = _sniff(self.filepath)
+        parser_cls, blockparsers, columnmapping = _FORMATS[version]
+        self._mapping = common.select_columns(columnmapping, self.columns)
+        self._blockparser = common.select_blockparsers(
+            blockparsers, self._mapping, version, self.columns
+        )["TrackData"]
+
+        # the data and the resume offsets come from the same mapping of the file,
+        # in case the file is replaced in between
+        scoped_blocks = common.index_blocks(self.filepath, self._encoding)
+        self.data = parser_cls().parse_blocks(
+            scoped_blocks, reactors=self.reactors, columns=self.columns
+        )
+        self._states = {}
+        for r, reactor in self.data.items():
+            block = scoped_blocks[r].get("TrackData")
+            if block is not None and len(reactor.dataframe) > 1:
+                self._states[r] = _state_at_last_row(block)
+        return self.data
+
+    def _continues(self, block: common.Block, state: _TrackState) -> bool:
+        """Checks whether a trackdata block starts with the previously parsed rows."""
+        buffer = block._buffer
+        start = block.start
+        if block.nbytes < state.offset:
+            return False
+        if buffer[start : start + len(state.header)] != state.header:
+            return False
+        anchor_start = start + state.offset - len(state.anchor)
+        return buffer[anchor_start : start + state.offset] == state.anchor
+
+    def _append(self, reactor: core.ReactorData, block: common.Block, state: _TrackState):
+        buffer = block._buffer
+        rows = buffer[block.start + state.offset : block.stop]
+        if not rows.strip():
+            return
+        chunk = common.Block(state.header + rows, 0, len(state.header) + len(rows), block.encoding)
+        _, trackdata = self._blockparser("TrackData", chunk, reactor.id)
+
+        # the new rows replace the previously last row
+        n = len(reactor.trackdata) - 1
+        trackdata.index = pandas.RangeIndex(n, n + len(trackdata))
+        # the new rows continue the exported process time, also when it was re-referenced
+        parsed = reactor.dataframe.iloc[:n]
+        exported = reactor._exported_process_time
+        if exported is not None:
+            parsed = parsed.assign(process_time=exported.iloc[:n])
+        dataframe = common.transform_trackdata(
+            trackdata,
+            self._mapping,
+            self.data.version,
+            previous=parsed.iloc[n - 1 : n],
+        )
+        reactor._trackdata = pandas.concat([reactor.trackdata.iloc[:n], trackdata])
+        reactor._replace_dataframe(pandas.concat([parsed, dataframe]))
+        self._states[reactor.id] = _state_at_last_row(block)
+        return
+
+
+def iter_trackdata(
+    filepath, reactor: int, *, chunksize: int = 10000, columns=None
+) -> Iterator[pandas.DataFrame]:
+    """Streams the transformed trackdata of one reactor in chunks.
+
+    The chunks have the same index, `process_time` and forward-filling as `ReactorData.dataframe`.
+    Unlike there, mapped columns that have no values are included, such that all chunks have
+    the same columns. Only one chunk of the trackdata is held in memory at a time.
+
+    Args:
+        filepath (str or pathlib.Path): path pointing to the file of interest
+        reactor (int): number of the reactor
+        chunksize (int): number of trackdata rows per chunk
+        columns (iterable or None): names from the version's `columnmapping` to include in the
+            chunks, in addition to the time columns (None includes all)
+
+    Yields:
+        chunk (pandas.DataFrame): transformed rows of the reactor's trackdata
+
+    Raises:
+        KeyError: when the file has no trackdata of the reactor
+    """
+    version, encoding = _sniff(filepath)
+    _, blockparsers, columnmapping = _FORMATS[version]
+    mapping = common.select_columns(columnmapping, columns)
+    blockparser = common.select_blockparsers(blockparsers, mapping, version, columns)["TrackData"]
+    block = common.index_blocks(filepath, encoding).get(reactor, {}).get("TrackData")
+    if block is None:
+        raise KeyError(f"The file has no trackdata of reactor {reactor}.")
+
+    def transform(trackdata, previous):
+        return common.transform_trackdata(
+            trackdata, mapping, version, previous=previous, drop_empty=False
+        )
+
+    _, reader = blockparser("TrackData", block, reactor, chunksize=chunksize)
+    previous = None
+    held = None
+    with reader:
+        for trackdata in reader:
+            # the last row is yielded with the next chunk, because the next chunk
+            # may start the process time, which sets the process time of the row before to 0
+            if held is not None:
+                trackdata = pandas.concat([held, trackdata])
+            held = trackdata.iloc[-1:]
+            if len(trackdata) > 1:
+                chunk = transform(trackdata, previous).iloc[:-1]
+                previous = chunk.iloc[-1:]
+                yield chunk
+    if held is not None:
+        yield transform(held, previous)
+    return
+
+
+def _sniff(filepath):
+    # imported here, because the package imports this module
+    from . import sniff
+
+    return sniff(filepath)
+
+
+def _state_at_last_row(block: common.Block) -> _TrackState:
+    """Creates the state that resumes parsing at the last row of a trackdata block."""
+    buffer = block._buffer
+    header_stop = buffer.find(b"\n", block.start, block.stop) + 1
+    last_row = buffer.rfind(b"\n", header_stop, block.stop) + 1
+    anchor_start = max(header_stop, last_row - ANCHOR_BYTES)
+    return _TrackState(
+        header=bytes(buffer[block.start : header_stop]),
+        offset=last_row - block.start,
+        anchor=bytes(buffer[anchor_start:last_row]),
+    )
@@ -0,0 +1,202 @@
+"""Export of parsed DASware data to Apache Arrow and Parquet.
+
+`pyarrow` is an optional dependency that is only needed for the functions of this module.
+
+A `DWData` is written to a directory with the following layout:
+
+    detl.json                            DASware version, detl version and reactor numbers
+    dataframe/reactor=<N>/part-0.parquet  transformed trackdata of reactor N
+    <table>/reactor=<N>/part-0.parquet    reactor tables, for example "setup" or "unit"
+    <table>.parquet                       tables of the entire file, for example "events"
+
+The reactor directories follow the Hive partitioning convention, so the dataframes of all
+reactors can be queried as one dataset by tools like Spark or DuckDB.
+"""
+
+import json
+import pathlib
+from typing import Dict
+
+import numpy
+import pandas
+
+from . import core
+from .parsing import common, dw4, dw5
+
+# file with the information that is not part of any table
+MANIFEST = "detl.json"
+# attributes that are not written as metadata tables
+_REACTOR_SKIP = ("_trackdata", "_dataframe")
+_COLUMNMAPPINGS = {
+    core.DASwareVersion.V4: dw4.columnmapping,
+    core.DASwareVersion.V5: dw5.columnmapping,
+}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as ex:
+        raise ImportError(
+            "The Arrow/Parquet export requires `pyarrow`. "
+            "Install it with `pip install detl[parquet]`."
+        ) from ex
+    return pyarrow
+
+
+def _tables(obj: core.LazyTables, skip=()) -> Dict[str, pandas.DataFrame]:
+    """Collects the metadata tables of a data object by name (without the leading underscore)."""
+    tables = {}
+    for attr in list(vars(obj)):
+        if attr.startswith("_") and not attr in skip:
+            value = obj._get(attr)
+            if isinstance(value, pandas.DataFrame):
+                tables[attr[1:]] = value
+    return tables
+
+
+def _arrow_compatible(df: pandas.DataFrame) -> pandas.DataFrame:
+    """Converts object columns with values of mixed types (as in transposed tables) to strings."""
+    pyarrow = _import_pyarrow()
+    columns = {}
+    for c, column in df.items():
+        if column.dtype == object:
+            try:
+                pyarrow.array(column, from_pandas=True)
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+                column = column.map(lambda value: value if pandas.isna(value) else str(value))
+        columns[c] = column
+    result = pandas.DataFrame(columns, index=df.index)
+    result.columns = df.columns
+    return result
+
+
+def _write_table(df: pandas.DataFrame, filepath: pathlib.Path):
+    pyarrow = _import_pyarrow()
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    table = pyarrow.Table.from_pandas(_arrow_compatible(df))
+    pyarrow.parquet.write_table(table, filepath)
+    return
+
+
+def _read_table(filepath: pathlib.Path, columns=None) -> pandas.DataFrame:
+    pyarrow = _import_pyarrow()
+    return pyarrow.parquet.read_table(filepath, columns=columns).to_pandas()
+
+
+def _partition(directory: pathlib.Path, table: str, reactor: int) -> pathlib.Path:
+    return directory / table / f"reactor={reactor}" / "part-0.parquet"
+
+
+def to_arrow(data: core.DWData):
+    """Converts the dataframes of all reactors into one Arrow table.
+
+    Args:
+        data (DWData): parsed data
+
+    Returns:
+        table (pyarrow.Table): the reactor dataframes with a leading "reactor" column.
+            Columns that some reactors don't have are null in their rows.
+            The schema metadata contains the DASware and detl versions.
+    """
+    pyarrow = _import_pyarrow()
+    from . import __version__
+
+    tables = []
+    for r, reactor in data.items():
+        table = pyarrow.Table.from_pandas(reactor.dataframe, preserve_index=False)
+        reactor_column = pyarrow.array(numpy.full(len(table), r, dtype=numpy.int16))
+        tables.append(table.add_column(0, "reactor", reactor_column).replace_schema_metadata())
+    if tables:
+        table = pyarrow.concat_tables(tables, promote_options="default")
+    else:
+        table = pyarrow.table({"reactor": pyarrow.array([], pyarrow.int16())})
+    return table.replace_schema_metadata(
+        {"dasware_version": data.version.value, "detl_version": __version__}
+    )
+
+
+def to_parquet(data: core.DWData, directory):
+    """Writes a data object to a directory of Parquet files.
+
+    The raw trackdata is not written, because the dataframes contain its information.
+    Values in columns of mixed types, which occur in the transposed tables like `projectinfo`,
+    are written as strings.
+
+    Args:
+        data (DWData): parsed data
+        directory (str or pathlib.Path): directory to write to (created if needed)
+    """
+    from . import __version__
+
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, df in _tables(data).items():
+        _write_table(df, directory / f"{name}.parquet")
+    for r, reactor in data.items():
+        _write_table(reactor.dataframe, _partition(directory, "dataframe", r))
+        for name, df in _tables(reactor, skip=_REACTOR_SKIP).items():
+            _write_table(df, _partition(directory, name, r))
+    manifest = dict(
+        dasware_version=data.version.value, detl_version=__version__, reactors=list(data)
+    )
+    (directory / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return
+
+
+def from_parquet(directory, *, reactors=None, columns=None) -> core.DWData:
+    """Loads a data object from a directory written by `to_parquet`.
+
+    Only the manifest is read right away.
+    The tables are read when they are first accessed.
+
+    Args:
+        directory (str or pathlib.Path): directory that was written by `to_parquet`
+        reactors (iterable or None): numbers of the reactors to load (None loads all)
+        columns (iterable or None): names from the version's `columnmapping` to read into the
+            reactor dataframes, in addition to the time columns (None reads all)
+
+    Returns:
+        data (DWData): data object without raw trackdata
+
+    Raises:
+        FileNotFoundError: when the directory has no manifest
+        KeyError: when a selected reactor is not in the directory, or a column is unknown
+    """
+    _import_pyarrow()
+    directory = pathlib.Path(directory)
+    manifest = json.loads((directory / MANIFEST).read_text())
+    version = core.DASwareVersion(manifest["dasware_version"])
+    available = manifest["reactors"]
+    if reactors is None:
+        reactors = available
+    missing = set(reactors).difference(available)
+    if missing:
+        raise KeyError(f"Reactors {sorted(missing)} are not in {directory}.")
+    if columns is not None:
+        mapping = common.select_columns(_COLUMNMAPPINGS[version], columns)
+        columns = list(common.TIME_COLUMNS) + list(mapping)
+
+    data = core.DWData(version)
+    for fp in sorted(directory.glob("*.parquet")):
+        data._defer(f"_{fp.stem}", lambda fp=fp: _read_table(fp))
+    for r in reactors:
+        reactor = core.ReactorData(r)
+        reactor._defer("_dataframe", lambda r=r: _read_dataframe(directory, r, columns))
+        for fp in sorted(directory.glob(f"*/reactor={r}/part-0.parquet")):
+            name = fp.parent.parent.name
+            if name != "dataframe":
+                reactor._defer(f"_{name}", lambda fp=fp: _read_table(fp))
+        data[r] = reactor
+    return data
+
+
+def _read_dataframe(directory: pathlib.Path, reactor: int, columns=None) -> pandas.DataFrame:
+    """Reads the dataframe of a reactor, skipping selected columns that the reactor doesn't have."""
+    pyarrow = _import_pyarrow()
+    filepath = _partition(directory, "dataframe", reactor)
+    if columns is not None:
+        schema = pyarrow.parquet.read_schema(filepath)
+        columns = [c for c in columns if c in schema.names]
+    return _read_table(filepath, columns)
@@ -1,6 +1,11 @@
+import codecs
 import collections
-import datetime
+import concurrent.futures
+import functools
+import io
 import logging
+import mmap
+import os
 import pathlib
 import re
 import warnings
@@ -9,87 +14,545 @@ from io import StringIO
 import numpy
 import pandas
 
-from .. import core
+from .. import core, profiling
 from . import utils
 
 logger = logging.getLogger("detl.parsing.common")
 
+# columns of the transformed trackdata that are derived from the time information
+TIME_COLUMNS = ("timestamp", "duration", "process_time")
 
-def split_blocks(filepath: pathlib.Path) -> dict:
-    """Reads a CSV file and splits its contents into scoped blocks.
+# regular expressions that identify the trackdata column with the time since inoculation
+INOCULATION_TIME_PATTERNS = {
+    core.DASwareVersion.V4: ".*Inoculation Time.*",
+    core.DASwareVersion.V5: ".*InoculationTime.*",
+}
+
+
+# engines of `read_block`
+ENGINES = ("c", "threaded")
+# smallest piece of a block that is worth to be read on its own thread
+THREADED_MIN_BYTES = 1024**2
+
+# one or more empty lines separate the table-blocks of a DASware CSV
+_BLOCK_SEPARATOR = re.compile(rb"\n(?:\r?\n)+")
+# any byte that is not 7-bit ASCII
+_NON_ASCII = re.compile(rb"[\x80-\xff]")
+# size of the pieces in which `is_utf8` decodes a file
+_DECODE_CHUNK_BYTES = 16 * 1024**2
+
+
+class Block(object):
+    """Byte range of one table-block in a memory-mapped DASware CSV file.
+
+    Blocks of a file that was indexed by `index_blocks` can be pickled.
+    They are pickled as the path and byte range, and the file is mapped again when the
+    unpickled block is read, provided that its size and modification time did not change.
+    """
+
+    def __init__(
+        self, buffer, start: int, stop: int, encoding: str = "utf-8", source: tuple = None
+    ):
+        """Creates a block.
+
+        Args:
+            buffer (bytes or mmap.mmap): contents of the file
+            start (int): offset of the first byte of the block contents
+            stop (int): offset after the last byte of the block contents
+            encoding (str): text encoding of the file
+            source (tuple or None): (absolute path, size, modification time in ns) of the
+                memory-mapped file, for mapping it again after unpickling
+        """
+        self._mapped = buffer
+        self._start = start
+        self._stop = stop
+        self._encoding = encoding
+        self._source = source
+
+    @property
+    def _buffer(self):
+        if self._mapped is None:
+            self._mapped = _map_file(*self._source)
+        return self._mapped
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if isinstance(self._mapped, mmap.mmap):
+            if self._source is None:
+                raise TypeError("Blocks of a memory-mapped file without a source can't be pickled.")
+            state["_mapped"] = None
+        return state
+
+    @property
+    def start(self) -> int:
+        """Offset of the first byte of the block contents in the file."""
+        return self._start
+
+    @property
+    def stop(self) -> int:
+        """Offset after the last byte of the block contents in the file."""
+        return self._stop
+
+    @property
+    def encoding(self) -> str:
+        """Text encoding of the file."""
+        return self._encoding
+
+    @property
+    def nbytes(self) -> int:
+        return self._stop - self._start
+
+    def open(self) -> io.BufferedReader:
+        """Opens a binary file-like object over the block contents without copying them."""
+        return io.BufferedReader(_BufferReader(memoryview(self._buffer)[self._start : self._stop]))
+
+    def read(self) -> str:
+        """Decodes the block contents into a string with universal newlines."""
+        text = str(self._buffer[self._start : self._stop], self._encoding, errors="replace")
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+
+    def __str__(self) -> str:
+        return self.read()
+
+    def __repr__(self) -> str:
+        return f"Block({self._start}:{self._stop})"
+
+
+class _BufferReader(io.RawIOBase):
+    """Raw binary stream reading from one or more consecutive memoryviews."""
+
+    def __init__(self, *views: memoryview):
+        self._views = list(views)
+        self._position = 0
+        super().__init__()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while self._views and self._position == len(self._views[0]):
+            self._views.pop(0)
+            self._position = 0
+        if not self._views:
+            return 0
+        view = self._views[0]
+        n = min(len(b), len(view) - self._position)
+        b[:n] = view[self._position : self._position + n]
+        self._position += n
+        return n
+
+
+def _map_file(filepath: str, size: int, mtime_ns: int) -> mmap.mmap:
+    """Memory-maps a file again, making sure that it is still the file that was indexed.
+
+    Raises:
+        FileNotFoundError: when the file no longer exists
+        RuntimeError: when the size or modification time of the file changed
+    """
+    with open(filepath, mode="rb") as file:
+        stat = os.fstat(file.fileno())
+        if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+            raise RuntimeError(f"The file {filepath} changed since it was parsed.")
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _strip_range(buffer, start: int, stop: int) -> tuple:
+    """Narrows a byte range such that it does not start or end with whitespace."""
+    while start < stop and buffer[start : start + 1].isspace():
+        start += 1
+    while stop > start and buffer[stop - 1 : stop].isspace():
+        stop -= 1
+    return start, stop
+
+
+def _scope_blockheader(blockheader: str, scope):
+    """Determines the scope of a block from its header line.
+
+    Args:
+        blockheader (str): first line of the block, for example '"[TrackData1]"'
+        scope (None or int): scope of the previous block
+
+    Returns:
+        header (str): name of the block without brackets and reactor number
+        scope (None or int): scope of the block
+    """
+    setup_matches = re.findall(r'"\[Setup(\d+)\]"', blockheader)
+    track_matches = re.findall(r'"\[TrackData(\d+)\]"', blockheader)
+    if len(track_matches) == 1:
+        scope = int(track_matches[0])
+    elif blockheader == '"[Events]"':
+        scope = None
+    elif len(setup_matches) == 1:
+        scope = int(setup_matches[0])
+    blockheader = blockheader[2:-2]
+    if scope:
+        blockheader = blockheader.strip(str(scope))
+    return blockheader, scope
+
+
+def index_blocks(filepath: pathlib.Path, encoding: str = "utf-8") -> dict:
+    """Memory-maps a CSV file and indexes the byte ranges of its scoped blocks.
 
     Args:
         filepath (pathlib.Path): path to the raw CSV
+        encoding (str): text encoding of the file
 
     Returns:
-        scoped_blocks (dict): dicationary mapping scope to dictionary of blocks
+        scoped_blocks (dict): dicationary mapping scope to dictionary of `Block` objects
     """
     if not isinstance(filepath, (str, pathlib.Path)):
         raise ValueError("Please provide filepath either as str or pathlib.Path object")
 
-    # split the entire file into table-blocks
-    blocks = [[]]
-    with pathlib.Path(filepath).open(mode="r", errors="replace") as file:
-        for line in file:
-            if len(line) == 1:
-                blocks.append([])
-            else:
-                blocks[-1].append(line)
-    # drop empty blocks
-    blocks = [block for block in blocks if len(block) > 1]
-
-    # group blocks by scope (None or reactor-number)
     scoped_blocks = collections.defaultdict(dict)
+    with pathlib.Path(filepath).open(mode="rb") as file:
+        stat = os.fstat(file.fileno())
+        if stat.st_size == 0:
+            return scoped_blocks
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    source = (str(pathlib.Path(filepath).resolve()), stat.st_size, stat.st_mtime_ns)
+
     scope = None
-    for blocklines in blocks:
-        blockheader = blocklines[0].strip()
-        setup_matches = re.findall(r'"\[Setup(\d+)\]"', blockheader)
-        track_matches = re.findall(r'"\[TrackData(\d+)\]"', blockheader)
-        if len(track_matches) == 1:
-            scope = int(track_matches[0])
-        elif blockheader == '"[Events]"':
-            scope = None
-        elif len(setup_matches) == 1:
-            scope = int(setup_matches[0])
-        blockheader = blockheader[2:-2]
-        if scope:
-            blockheader = blockheader.strip(str(scope))
-        scoped_blocks[scope][blockheader] = "".join(blocklines[1:]).strip()
+    start = 0
+    separators = [m.span() for m in _BLOCK_SEPARATOR.finditer(buffer)]
+    for stop, next_start in separators + [(len(buffer), None)]:
+        block_start, block_stop = _strip_range(buffer, start, stop)
+        start = next_start
+        eol = buffer.find(b"\n", block_start, block_stop)
+        # drop blocks without contents
+        if eol < 0:
+            continue
+        blockheader = str(buffer[block_start:eol], encoding, errors="replace").strip()
+        blockheader, scope = _scope_blockheader(blockheader, scope)
+        content_start, content_stop = _strip_range(buffer, eol + 1, block_stop)
+        scoped_blocks[scope][blockheader] = Block(
+            buffer, content_start, content_stop, encoding, source
+        )
     return scoped_blocks
 
 
+def is_utf8(filepath: pathlib.Path) -> bool:
+    """Checks if a file is valid UTF-8, without loading it into memory.
+
+    The file is memory-mapped and decoded in pieces, starting at its first non-ASCII byte.
+
+    Args:
+        filepath (pathlib.Path): path to the file
+
+    Returns:
+        is_utf8 (bool): if all bytes of the file are valid UTF-8
+    """
+    with pathlib.Path(filepath).open(mode="rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return True
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    with buffer:
+        match = _NON_ASCII.search(buffer)
+        if match is None:
+            return True
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            for start in range(match.start(), len(buffer), _DECODE_CHUNK_BYTES):
+                decoder.decode(buffer[start : start + _DECODE_CHUNK_BYTES])
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return False
+    return True
+
+
+def split_blocks(filepath: pathlib.Path) -> dict:
+    """Reads a CSV file and splits its contents into scoped blocks.
+
+    Args:
+        filepath (pathlib.Path): path to the raw CSV
+
+    Returns:
+        scoped_blocks (dict): dicationary mapping scope to dictionary of blocks
+    """
+    scoped_blocks = index_blocks(filepath)
+    for blocks in scoped_blocks.values():
+        for header, block in blocks.items():
+            blocks[header] = block.read()
+    return scoped_blocks
+
+
+def read_block(block, *, engine: str = "c", **kwargs) -> pandas.DataFrame:
+    """Reads the table of a block with `pandas.read_csv`.
+
+    Args:
+        block (str or Block): block contents
+        engine (str): "c" reads the block with one `pandas.read_csv` call.
+            "threaded" reads large blocks in line-aligned pieces on a thread pool (see
+            `read_block_threaded`). It only applies to `Block` objects without `chunksize`.
+        **kwargs: additional keyword-arguments for `pandas.read_csv`
+
+    Returns:
+        df (pandas.DataFrame): table of the block
+
+    Raises:
+        ValueError: when the engine is unknown
+    """
+    if not engine in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Must be one of {ENGINES}.")
+    if isinstance(block, Block):
+        if engine == "threaded" and not "chunksize" in kwargs:
+            return read_block_threaded(block, **kwargs)
+        return pandas.read_csv(
+            block.open(), sep=";", encoding=block.encoding, encoding_errors="replace", **kwargs
+        )
+    return pandas.read_csv(StringIO(block), sep=";", **kwargs)
+
+
+def read_block_threaded(
+    block: Block, n_threads: int = None, min_bytes: int = THREADED_MIN_BYTES, **kwargs
+) -> pandas.DataFrame:
+    """Reads the table of a block in line-aligned pieces on a thread pool.
+
+    The pandas C parser releases the GIL while it tokenizes and converts, so the pieces are
+    parsed on multiple cores. Each piece is parsed together with the header line, so the
+    column names, `usecols` and the number conversion are the same as in a single call.
+    When the type inference of the pieces disagrees (for example text in one piece and
+    numbers in another), the block is read again in a single call.
+
+    Args:
+        block (Block): block whose first line is the table header
+        n_threads (int or None): number of pieces and threads (defaults to the number of CPUs)
+        min_bytes (int): smallest size of a piece. Smaller blocks are read in a single call.
+        **kwargs: additional keyword-arguments for `pandas.read_csv`
+
+    Returns:
+        df (pandas.DataFrame): table of the block, identical to `read_block(block)`
+    """
+    buffer = block._buffer
+    header_stop = buffer.find(b"\n", block.start, block.stop) + 1
+    n_threads = n_threads or os.cpu_count() or 1
+    n_pieces = min(n_threads, (block.stop - header_stop) // min_bytes)
+    if header_stop <= 0 or n_pieces < 2:
+        return read_block(block, **kwargs)
+
+    # piece boundaries are moved to the start of the next line
+    bounds = [header_stop]
+    for i in range(1, n_pieces):
+        target = header_stop + (block.stop - header_stop) * i // n_pieces
+        bounds.append(max(bounds[-1], buffer.find(b"\n", target, block.stop) + 1 or block.stop))
+    bounds.append(block.stop)
+
+    view = memoryview(buffer)
+    header = view[block.start : header_stop]
+
+    def read_piece(i):
+        reader = io.BufferedReader(_BufferReader(header, view[bounds[i] : bounds[i + 1]]))
+        return pandas.read_csv(
+            reader, sep=";", encoding=block.encoding, encoding_errors="replace", **kwargs
+        )
+
+    pieces = map_jobs(read_piece, range(n_pieces), n_jobs=n_threads)
+    pieces = [p for p in pieces if len(p) > 0] or pieces[:1]
+    columns = {}
+    for c, name in enumerate(pieces[0].columns):
+        parts = [p.iloc[:, c] for p in pieces]
+        column = _concat_pieces(parts)
+        if column is None:
+            logger.debug(f"Types of column '{name}' differ between pieces. Reading it again.")
+            return read_block(block, **kwargs)
+        columns[c] = column
+    df = pandas.DataFrame(columns)
+    df.columns = pieces[0].columns
+    return df
+
+
+def _concat_pieces(parts: list):
+    """Concatenates the pieces of a column like `pandas.read_csv` would have inferred it.
+
+    Returns:
+        column (pandas.Series or None): the column, or None if the pieces can't be combined
+    """
+    # pieces without values are parsed as float
+    typed = [part for part in parts if part.dtype.kind != "f" or part.notna().any()]
+    dtypes = {part.dtype for part in typed}
+    if len(dtypes) == 1:
+        dtype = typed[0].dtype
+        if isinstance(dtype, pandas.StringDtype):
+            parts = [part if part.dtype == dtype else part.astype(dtype) for part in parts]
+    elif not {dtype.kind for dtype in dtypes} <= {"i", "f"}:
+        # the numbers of some pieces were text in others
+        return None
+    return pandas.concat(parts, ignore_index=True)
+
+
+def map_jobs(func, items, n_jobs: int = 1) -> list:
+    """Applies a function to all items, optionally on a thread pool.
+
+    The heavy lifting of parsing (``pandas.read_csv``, NumPy) releases the GIL,
+    so independent blocks and reactors can be processed concurrently in threads.
+
+    Args:
+        func (callable): function to apply
+        items (iterable): arguments for `func`
+        n_jobs (int): number of threads (1 runs serially, -1 uses one thread per CPU)
+
+    Returns:
+        results (list): results of `func` in the order of `items`
+    """
+    items = list(items)
+    if n_jobs == 1 or len(items) < 2:
+        return [func(item) for item in items]
+    max_workers = os.cpu_count() if n_jobs == -1 else n_jobs
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
+        return list(pool.map(func, items))
+
+
+def block_attr(header: str) -> str:
+    """Name of the private attribute that holds the table of a block."""
+    return "_" + header.lower().replace(" ", "_").replace("-", "_")
+
+
+def run_blockparser(blockparser, header: str, block, scope):
+    """Runs a block parser, logging instead of raising when the block can't be parsed.
+
+    Returns:
+        result (tuple or None): attribute name and table, or None if parsing failed
+    """
+    try:
+        return blockparser(header, block, scope)
+    except NotImplementedError as ex:
+        logger.debug(f'scope {scope}: Parsing function for "{header}" is not implemented')
+    except:
+        logger.warning(f'scope {scope}: Failed to parse block "{header}"')
+    return None
+
+
+def _parse_block(blockparser, header: str, block, scope, profile=None):
+    """Runs a block parser as a stage of the profile."""
+    with profiling.stage(profile, "parse_block", scope=scope, block=header) as record:
+        record["nbytes"] = block.nbytes if isinstance(block, Block) else len(block)
+        result = run_blockparser(blockparser, header, block, scope)
+        if result is not None and result[1] is not None:
+            record["rows"] = len(result[1])
+    return result
+
+
+def _load_block(blockparser, header: str, block, scope, profile=None):
+    if isinstance(block, Block):
+        # a file that changed since it was indexed raises, instead of being logged as unparsable
+        block._buffer
+    result = _parse_block(blockparser, header, block, scope, profile)
+    return None if result is None else result[1]
+
+
 def transform_to_dwdata(
-    scoped_blocks: dict, blockparsers: dict, version: core.DASwareVersion
+    scoped_blocks: dict,
+    blockparsers: dict,
+    version: core.DASwareVersion,
+    n_jobs: int = 1,
+    lazy: bool = False,
+    profile: profiling.ParseProfile = None,
+    reloadable=(),
 ) -> core.DWData:
+    """Creates a data object from the scoped blocks of a DASware CSV.
+
+    Args:
+        scoped_blocks (dict): dicationary mapping scope to dictionary of blocks
+        blockparsers (dict): parsing functions by block header
+        version (core.DASwareVersion): inform about the DASware version of the file that is being processed
+        n_jobs (int): number of scopes to parse concurrently
+        lazy (bool): if True, blocks are only parsed when their table is first accessed
+        profile (ParseProfile or None): records a "parse_block" stage for every block
+        reloadable (iterable): headers of the blocks whose tables can be released and parsed
+            again on access (see `LazyTables._release`). Their blocks stay memory-mapped.
+
+    Returns:
+        dd (core.DWData): data object holding the tables of all blocks
+    """
     dd = core.DWData(version)
-    for scope, blocks in scoped_blocks.items():
+    for scope in scoped_blocks:
         if scope is not None and not scope in dd:
             dd[scope] = core.ReactorData(scope)
-        for header, block in blocks.items():
+
+    def parse_scope(scope):
+        target = dd if scope is None else dd[scope]
+        for header, block in scoped_blocks[scope].items():
             if not header in blockparsers:
                 logger.warn(f'No parser found for block "{header}"')
                 continue
             blockparser = blockparsers[header]
-            if blockparser is not None:
-                try:
-                    attr, df = blockparser(header, block, scope)
-                    if scope is None:
-                        setattr(dd, attr, df)
-                    else:
-                        setattr(dd[scope], attr, df)
-                except NotImplementedError as ex:
-                    logger.debug(
-                        f'scope {scope}: Parsing function for "{header}" is not implemented'
-                    )
-                except:
-                    logger.warning(f'scope {scope}: Failed to parse block "{header}"')
+            if blockparser is None:
+                continue
+            loader = functools.partial(_load_block, blockparser, header, block, scope, profile)
+            if header in reloadable:
+                target._reloadable(block_attr(header), loader)
+            if lazy:
+                target._defer(block_attr(header), loader)
+                continue
+            result = _parse_block(blockparser, header, block, scope, profile)
+            if result is not None:
+                attr, df = result
+                setattr(target, attr, df)
+
+    map_jobs(parse_scope, scoped_blocks, n_jobs)
     return dd
 
 
-def parse_generic(header, block, scope):
-    df = pandas.read_csv(StringIO(block), sep=";")
-    attr = "_" + header.lower().replace(" ", "_").replace("-", "_")
-    return (attr, df)
+def transform_reactors(
+    dd: core.DWData,
+    columnmapping: dict,
+    version: core.DASwareVersion,
+    n_jobs: int = 1,
+    lazy: bool = False,
+    compact: bool = False,
+    profile: profiling.ParseProfile = None,
+    keep_trackdata: bool = True,
+):
+    """Transforms the trackdata of all reactors into their primary dataframe.
+
+    Args:
+        dd (core.DWData): data object with parsed trackdata
+        columnmapping (dict): Mapping from trackdata column names to reasonable column names
+        version (core.DASwareVersion): inform about the DASware version of the file that is being processed
+        n_jobs (int): number of reactors to transform concurrently
+        lazy (bool): if True, the transformation runs when the dataframe is first accessed
+        compact (bool): if True, the signal columns are stored with compact dtypes
+            (see `compact_dataframe`)
+        profile (ParseProfile or None): records a "transform_trackdata" stage for every reactor,
+            and a "compact_dataframe" stage if `compact` is set
+        keep_trackdata (bool): if False, the trackdata is released after the transformation.
+            This requires the trackdata to be reloadable (see `transform_to_dwdata`).
+    """
+
+    def transform(reactor):
+        def loader():
+            trackdata = reactor.trackdata
+            with profiling.stage(profile, "transform_trackdata", scope=reactor.id) as record:
+                df = transform_trackdata(trackdata, columnmapping, version)
+                record["rows"] = len(df)
+                record["nbytes"] = int(df.memory_usage(deep=True).sum())
+            if compact:
+                with profiling.stage(profile, "compact_dataframe", scope=reactor.id) as record:
+                    before = df.memory_usage(deep=True).sum()
+                    df = compact_dataframe(df)
+                    after = df.memory_usage(deep=True).sum()
+                    record["rows"] = len(df)
+                    record["nbytes"] = int(after)
+                logger.info(
+                    f"scope {reactor.id}: compacted dataframe from "
+                    f"{before / 1e6:.1f} MB to {after / 1e6:.1f} MB"
+                )
+            if not keep_trackdata:
+                del trackdata
+                reactor._release("_trackdata")
+            return df
+
+        if lazy:
+            reactor._defer("_dataframe", loader)
+        else:
+            reactor._dataframe = loader()
+
+    map_jobs(transform, dd.values(), n_jobs)
+    return
+
+
+def parse_generic(header, block, scope, **kwargs):
+    df = read_block(block, **kwargs)
+    return (block_attr(header), df)
 
 
 def parse_generic_T(header, block, scope):
@@ -109,8 +572,160 @@ def parse_profile_columns(header, block, scope):
     raise NotImplementedError()
 
 
+def select_scopes(scoped_blocks: dict, reactors=None) -> dict:
+    """Drops the blocks of reactors that were not selected.
+
+    Args:
+        scoped_blocks (dict): dicationary mapping scope to dictionary of blocks
+        reactors (iterable or None): numbers of the reactors to keep (None keeps all)
+
+    Returns:
+        scoped_blocks (dict): the global blocks and those of the selected reactors
+
+    Raises:
+        KeyError: when a selected reactor is not in the file
+    """
+    if reactors is None:
+        return scoped_blocks
+    reactors = set(reactors)
+    missing = reactors.difference(scoped_blocks)
+    if missing:
+        raise KeyError(f"Reactors {sorted(missing)} are not in the file.")
+    return {
+        scope: blocks
+        for scope, blocks in scoped_blocks.items()
+        if scope is None or scope in reactors
+    }
+
+
+def select_columns(columnmapping: dict, columns=None) -> dict:
+    """Reduces a column mapping to the selected target columns.
+
+    Args:
+        columnmapping (dict): Mapping from trackdata column names to reasonable column names
+        columns (iterable or None): names of the target columns to keep (None keeps all).
+            The time columns "timestamp", "duration" and "process_time" are always kept.
+
+    Returns:
+        columnmapping (dict): the mapping of the selected columns
+
+    Raises:
+        KeyError: when a column is not in the mapping
+    """
+    if columns is None:
+        return columnmapping
+    columns = [c for c in columns if not c in TIME_COLUMNS]
+    unknown = [c for c in columns if not c in columnmapping]
+    if unknown:
+        raise KeyError(f"Unknown columns {unknown}. Valid names are: {list(columnmapping)}")
+    return {key: columnmapping[key] for key in columns}
+
+
+def trackdata_usecols(columnmapping: dict, version: core.DASwareVersion):
+    """Creates a `usecols` filter that only reads the trackdata columns needed for the mapping.
+
+    Args:
+        columnmapping (dict): Mapping from trackdata column names to reasonable column names
+        version (core.DASwareVersion): inform about the DASware version of the file that is being processed
+
+    Returns:
+        usecols (callable): returns True for the names of the trackdata columns to read
+    """
+    patterns = [re.compile(INOCULATION_TIME_PATTERNS[version])]
+    patterns += [re.compile(reg) for reg in columnmapping.values()]
+    return _UseCols(patterns)
+
+
+class _UseCols(object):
+    """Column filter of `trackdata_usecols` (a class instead of a closure, so it can be pickled)."""
+
+    def __init__(self, patterns: list):
+        self.patterns = patterns
+
+    def __call__(self, name: str) -> bool:
+        return name in {"Timestamp", "Duration"} or any(p.search(name) for p in self.patterns)
+
+
+def select_blockparsers(
+    blockparsers: dict,
+    columnmapping: dict,
+    version: core.DASwareVersion,
+    columns=None,
+    engine: str = "c",
+) -> dict:
+    """Adapts the trackdata block parser to the selected columns and CSV engine.
+
+    Args:
+        blockparsers (dict): parsing functions by block header
+        columnmapping (dict): the (already selected) column mapping
+        version (core.DASwareVersion): inform about the DASware version of the file that is being processed
+        columns (iterable or None): names of the selected target columns (None selects all).
+            Only the trackdata of the selected columns is read.
+        engine (str): engine of `read_block` for the trackdata
+
+    Returns:
+        blockparsers (dict): parsing functions by block header
+
+    Raises:
+        ValueError: when the engine is unknown
+    """
+    if not engine in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Must be one of {ENGINES}.")
+    kwargs = {}
+    if columns is not None:
+        kwargs["usecols"] = trackdata_usecols(columnmapping, version)
+    if engine != "c":
+        kwargs["engine"] = engine
+    if not kwargs:
+        return blockparsers
+    return {
+        **blockparsers,
+        "TrackData": functools.partial(blockparsers["TrackData"], **kwargs),
+    }
+
+
+@functools.lru_cache(maxsize=64)
+def resolve_columns(header: tuple, inoculation_pattern: str, mapping: tuple) -> tuple:
+    """Resolves which trackdata columns are the sources of the transformed columns.
+
+    Exports from the same DASware version and hardware share their trackdata headers,
+    so the regular expressions are matched only once per distinct header.
+
+    Args:
+        header (tuple): column names of the trackdata
+        inoculation_pattern (str): regular expression of the time since inoculation column
+        mapping (tuple): (target name, regular expression) items of a column mapping
+
+    Returns:
+        inoculation (int or None): position of the time since inoculation column
+        resolved (tuple): (target name, source position) pairs of the columns that were found
+
+    Raises:
+        ValueError: when a regular expression matches more than one column
+    """
+
+    def find(reg):
+        pattern = re.compile(reg)
+        matches = [c for c, name in enumerate(header) if pattern.search(name)]
+        if len(matches) > 1:
+            raise ValueError(
+                f"Pattern '{reg}' matches more than one column: {[header[c] for c in matches]}"
+            )
+        return matches[0] if matches else None
+
+    inoculation = find(inoculation_pattern)
+    resolved = tuple(
+        (key, c) for key, c in ((key, find(reg)) for key, reg in mapping) if c is not None
+    )
+    return inoculation, resolved
+
+
 def transform_trackdata(
-    trackdata: pandas.DataFrame, columnmapping: dict, version: core.DASwareVersion
+    trackdata: pandas.DataFrame,
+    columnmapping: dict,
+    version: core.DASwareVersion,
+    previous: pandas.DataFrame = None,
+    drop_empty: bool = True,
 ) -> pandas.DataFrame:
     """Parses trackdata to an useful DataFrame.
 
@@ -118,46 +733,87 @@ def transform_trackdata(
         trackdata (pandas.DataFrame): Trackdata derived from DASGIP raw data file
         columnmapping (dict): Mapping from trackdata column names to reasonable column names
         version (core.DASwareVersion): inform about the DASware version of the file that is being processed
+        previous (pandas.DataFrame or None): the last transformed row before `trackdata`.
+            When given, the process time and forward-filling continue from this row,
+            such that transforming trackdata in consecutive pieces gives the same result.
+        drop_empty (bool): if True, mapped columns without any values are left out.
+            Set to False to get the same columns for every piece of the same trackdata.
 
     Returns:
         transformed_data (pandas.DataFrame): DataFrame with structured data
     """
-    transformed_data = pandas.DataFrame(
-        index=trackdata.index,
-        columns=["timestamp", "duration", "process_time"],
-    )
-    transformed_data["timestamp"] = [utils.dwtimestamp_to_utc(t) for t in trackdata["Timestamp"]]
-    transformed_data["duration"] = trackdata["Duration"] * 24
-
-    magic_time = datetime.datetime.strptime("1899-12-30 00:00:00", "%Y-%m-%d %H:%M:%S")
-    switch = False
-    if version == core.DASwareVersion.V4:
-        ser = trackdata.filter(regex=".*Inoculation Time.*", axis="columns").squeeze()
-    elif version == core.DASwareVersion.V5:
-        ser = trackdata.filter(regex=".*InoculationTime.*", axis="columns").squeeze()
-    else:
+    if not version in INOCULATION_TIME_PATTERNS:
         raise NotImplementedError(f"Unknown DASwareVersion: {version}")
-    process_time = numpy.full(len(ser), numpy.nan)
-
-    if not ser.empty:
-        for i in range(len(ser)):
-            if pandas.notna(ser[i]):
-                td = datetime.datetime.strptime(ser[i], "%Y-%m-%d %H:%M:%S") - magic_time
-
-                if (not switch) and (td.total_seconds() > 0):
-                    switch = True
-                    process_time[i - 1] = float(0)
-
-                if switch:
-                    process_time[i] = td.total_seconds() / 3600
-
-    transformed_data["process_time"] = process_time
+    inoculation, resolved = resolve_columns(
+        tuple(trackdata.columns),
+        INOCULATION_TIME_PATTERNS[version],
+        tuple(columnmapping.items()),
+    )
 
-    for key, reg in columnmapping.items():
-        new_data = trackdata.filter(regex=reg, axis="columns").squeeze()
-        if (not new_data.empty) and (not new_data.isnull().all()):
-            transformed_data.loc[:, key] = new_data
+    process_time = numpy.full(len(trackdata), numpy.nan)
+    if inoculation is not None:
+        seconds = utils.dwtimespans_to_seconds(trackdata.iloc[:, inoculation])
+        # the process time starts with the first positive time since inoculation
+        inoculated = seconds > 0
+        if previous is not None and previous["process_time"].notna().all():
+            process_time = seconds / 3600
+        elif inoculated.any():
+            i = numpy.argmax(inoculated)
+            if i > 0:
+                process_time[i - 1] = 0
+            process_time[i:] = seconds[i:] / 3600
+
+    data = {
+        "timestamp": utils.dwtimestamps_to_utc(trackdata["Timestamp"]),
+        "duration": trackdata["Duration"] * 24,
+        "process_time": process_time,
+    }
+    for key, c in resolved:
+        new_data = trackdata.iloc[:, c]
+        if not drop_empty or not new_data.isnull().all():
+            data[key] = new_data
+
+    # all columns are assembled at once instead of being inserted one by one
+    transformed_data = pandas.DataFrame(data, index=trackdata.index)
+    if previous is None:
+        return transformed_data.ffill()
+
+    transformed_data = pandas.concat([previous, transformed_data]).ffill().iloc[len(previous) :]
+    order = list(TIME_COLUMNS) + list(columnmapping)
+    return transformed_data[[c for c in order if c in transformed_data.columns]]
+
+
+def compact_dataframe(df: pandas.DataFrame, decimals: int = 3) -> pandas.DataFrame:
+    """Converts the signal columns of a transformed dataframe to compact dtypes.
+
+    Text columns whose values are all numeric become float columns.
+    Float columns are stored as float32 when that is lossless, meaning that rounding the
+    float32 values to `decimals` gives back the original values.
+    DASware writes signals with 3 decimals, so this holds for all but very large values.
+    The time columns keep their dtypes, because they are the reference for lookups.
 
-    transformed_data = transformed_data.ffill()
+    Args:
+        df (pandas.DataFrame): dataframe as returned by `transform_trackdata`
+        decimals (int): number of decimals that must be preserved
 
-    return transformed_data
+    Returns:
+        df (pandas.DataFrame): dataframe with compact dtypes
+    """
+    columns = {}
+    for name, column in df.items():
+        if name in TIME_COLUMNS:
+            columns[name] = column
+            continue
+        if column.dtype == object or isinstance(column.dtype, pandas.StringDtype):
+            numeric = pandas.to_numeric(column, errors="coerce")
+            if numeric.isna().sum() == column.isna().sum():
+                column = numeric.astype(float)
+        if column.dtype == numpy.float64:
+            values = column.to_numpy()
+            compact = values.astype(numpy.float32)
+            restored = numpy.round(compact.astype(numpy.float64), decimals)
+            # the tolerance only forgives differences in the last bit of the parsed values
+            if numpy.allclose(restored, values, rtol=1e-12, atol=0, equal_nan=True):
+                column = pandas.Series(compact, index=column.index, name=name)
+        columns[name] = column
+    return pandas.DataFrame(columns, index=df.index)
@@ -4,7 +4,7 @@ import pathlib
 import numpy
 import pandas
 
-from .. import core
+from .. import core, profiling
 from . import common
 
 logger = logging.getLogger("detl.parsing.dw5")
@@ -124,21 +124,98 @@ columnmapping = {
 
 
 class DASware5Parser(core.DASwareParser):
-    def parse(self, filepath: pathlib.Path) -> core.DWData:
+    def parse(
+        self,
+        filepath: pathlib.Path,
+        *,
+        encoding: str = "utf-8",
+        n_jobs: int = 1,
+        lazy: bool = False,
+        reactors=None,
+        columns=None,
+        compact: bool = False,
+        profile: profiling.ParseProfile = None,
+        keep_trackdata: bool = True,
+        engine: str = "c",
+    ) -> core.DWData:
         """Parses the provided DASware CSV file into a data object.
 
         Args:
             filepath (str or pathlib.Path): path pointing to the file of interest
+            encoding (str): text encoding of the file
+            n_jobs (int): number of threads that parse and transform the reactors concurrently
+            lazy (bool): if True, blocks are parsed (and the trackdata transformed) only when the
+                corresponding property is first accessed. The file stays memory-mapped until then.
+            reactors (iterable or None): numbers of the reactors to parse (None parses all)
+            columns (iterable or None): names from `columnmapping` to include in the dataframes
+                (None includes all). Only the trackdata columns needed for them are read.
+            compact (bool): if True, signals are stored as float32 where that preserves
+                their 3 decimals
+            profile (ParseProfile or None): records the timing and memory of the parsing stages
+            keep_trackdata (bool): if False, the raw trackdata is freed after the transformation
+                and parsed again from the (unchanged) file when `ReactorData.trackdata`
+                is accessed, also after pickling
+            engine (str): CSV engine for the trackdata, "c" or "threaded" (see `common.read_block`)
         """
-        scoped_blocks = common.split_blocks(filepath)
+        with profiling.stage(profile, "index_blocks") as record:
+            scoped_blocks = common.index_blocks(filepath, encoding)
+            record["nbytes"] = pathlib.Path(filepath).stat().st_size
+        return self.parse_blocks(
+            scoped_blocks,
+            n_jobs=n_jobs,
+            lazy=lazy,
+            reactors=reactors,
+            columns=columns,
+            compact=compact,
+            profile=profile,
+            keep_trackdata=keep_trackdata,
+            engine=engine,
+        )
+
+    def parse_blocks(
+        self,
+        scoped_blocks: dict,
+        *,
+        n_jobs: int = 1,
+        lazy: bool = False,
+        reactors=None,
+        columns=None,
+        compact: bool = False,
+        profile: profiling.ParseProfile = None,
+        keep_trackdata: bool = True,
+        engine: str = "c",
+    ) -> core.DWData:
+        """Parses the blocks of an already indexed DASware CSV file into a data object.
+
+        Args:
+            scoped_blocks (dict): blocks of the file by scope (see `common.index_blocks`)
+            **kwargs: the options of `parse`
+        """
+        scoped_blocks = common.select_scopes(scoped_blocks, reactors)
+        mapping = common.select_columns(columnmapping, columns)
+        blockparsers = common.select_blockparsers(
+            BLOCKPARSERS, mapping, core.DASwareVersion.V5, columns, engine
+        )
         scoped_blocks = {
             key: value for (key, value) in scoped_blocks.items() if "TrackData" in list(value)
         }
-        dd = common.transform_to_dwdata(scoped_blocks, BLOCKPARSERS, version=core.DASwareVersion.V5)
-
-        for _, reactor in dd.items():
-            reactor._dataframe = common.transform_trackdata(
-                reactor.trackdata, columnmapping, core.DASwareVersion.V5
-            )
-
+        dd = common.transform_to_dwdata(
+            scoped_blocks,
+            blockparsers,
+            version=core.DASwareVersion.V5,
+            n_jobs=n_jobs,
+            lazy=lazy,
+            profile=profile,
+            reloadable=() if keep_trackdata else ("TrackData",),
+        )
+        common.transform_reactors(
+            dd,
+            mapping,
+            core.DASwareVersion.V5,
+            n_jobs=n_jobs,
+            lazy=lazy,
+            compact=compact,
+            profile=profile,
+            keep_trackdata=keep_trackdata,
+        )
         return dd
@@ -1,7 +1,41 @@
 import datetime
 
+import numpy
+import pandas
+
+DWTIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+DWMAGIC_TIME = datetime.datetime(1899, 12, 30)
+
 
 def dwtimestamp_to_utc(dwtimestamp: str) -> datetime.datetime:
-    dt = datetime.datetime.strptime(dwtimestamp, "%Y-%m-%d %H:%M:%S")
+    dt = datetime.datetime.strptime(dwtimestamp, DWTIMESTAMP_FORMAT)
     dt = dt.replace(tzinfo=datetime.timezone.utc)
     return dt.astimezone(datetime.timezone.utc)
+
+
+def dwtimestamps_to_utc(dwtimestamps: pandas.Series) -> pandas.Series:
+    """Vectorized version of `dwtimestamp_to_utc` for an entire column of DASware timestamps.
+
+    Args:
+        dwtimestamps (pandas.Series): timestamp strings as they appear in the DASware export
+
+    Returns:
+        timestamps (pandas.Series): timezone-aware (UTC) datetime column with the same index
+    """
+    return pandas.to_datetime(dwtimestamps, format=DWTIMESTAMP_FORMAT, utc=True)
+
+
+def dwtimespans_to_seconds(dwtimespans: pandas.Series) -> numpy.ndarray:
+    """Converts a column of DASware time spans into seconds.
+
+    DASware encodes time spans (for example the time since inoculation) as timestamps
+    relative to its "magic time" 1899-12-30 00:00:00.
+
+    Args:
+        dwtimespans (pandas.Series): time span strings as they appear in the DASware export
+
+    Returns:
+        seconds (numpy.ndarray): float array of seconds with NaN for missing entries
+    """
+    timestamps = pandas.to_datetime(dwtimespans, format=DWTIMESTAMP_FORMAT)
+    return (timestamps - DWMAGIC_TIME).dt.total_seconds().to_numpy(dtype=float)
@@ -0,0 +1,140 @@
+"""Timing and memory instrumentation of the parsing stages."""
+
+import contextlib
+import threading
+import time
+import tracemalloc
+from typing import Callable, Iterator, List, Optional
+
+import pandas
+
+# keys of every record, in the order of the `ParseProfile.to_dataframe` columns
+FIELDS = ("stage", "scope", "block", "start", "seconds", "rows", "nbytes", "peak_bytes")
+
+
+class ParseProfile(object):
+    """Records the wall time, size and peak memory of the stages of a parse.
+
+    Every stage produces one record (a dictionary with the keys in `FIELDS`):
+        stage (str): name of the stage, for example "sniff", "index_blocks", "parse_block",
+            "transform_trackdata", "compact_dataframe" or "parse" for the entire call
+        scope (int or None): reactor number, or None for stages of the entire file
+        block (str or None): header of the parsed block (only "parse_block")
+        start (float): seconds from the creation of the profile to the start of the stage
+        seconds (float): wall time of the stage
+        rows (int or None): number of rows of the resulting table
+        nbytes (int or None): number of bytes read (file and blocks) or held by the result (tables)
+        peak_bytes (int or None): peak of the memory allocated during the stage
+            (None when memory is not measured)
+
+    Stages of lazily parsed tables are recorded when the tables are first accessed.
+    Memory is measured with `tracemalloc`, which slows down the parse considerably.
+    It covers all threads, so with ``n_jobs > 1`` the peaks of concurrent stages overlap.
+    """
+
+    def __init__(self, *, memory: bool = True, callback: Optional[Callable[[dict], None]] = None):
+        """Creates an empty profile.
+
+        Args:
+            memory (bool): if True, the peak memory of each stage is measured with `tracemalloc`
+            callback (callable or None): called with every record when its stage ends,
+                for example to forward the records to a monitoring system
+        """
+        self.memory = memory
+        self.callback = callback
+        self.records: List[dict] = []
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        # absolute peaks of the traced memory by id of the active records
+        self._active = {}
+        self._tracing = False
+
+    def _update_peaks(self):
+        """Attributes the traced peak since the last update to all active stages."""
+        _, peak = tracemalloc.get_traced_memory()
+        for key, value in self._active.items():
+            self._active[key] = max(value, peak)
+        tracemalloc.reset_peak()
+        return
+
+    @contextlib.contextmanager
+    def stage(
+        self, name: str, *, scope: Optional[int] = None, block: Optional[str] = None
+    ) -> Iterator[dict]:
+        """Measures a stage.
+
+        Args:
+            name (str): name of the stage
+            scope (int or None): reactor number
+            block (str or None): header of the block
+
+        Yields:
+            record (dict): the record of the stage, whose "rows" and "nbytes" can be set
+        """
+        record = dict.fromkeys(FIELDS)
+        record.update(stage=name, scope=scope, block=block)
+        with self._lock:
+            if self.memory:
+                if not self._active and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._tracing = True
+                self._update_peaks()
+                start_bytes, _ = tracemalloc.get_traced_memory()
+                self._active[id(record)] = start_bytes
+        t_start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            t_stop = time.perf_counter()
+            with self._lock:
+                if self.memory:
+                    self._update_peaks()
+                    record["peak_bytes"] = self._active.pop(id(record)) - start_bytes
+                    if not self._active and self._tracing:
+                        tracemalloc.stop()
+                        self._tracing = False
+                record["start"] = t_start - self._t0
+                record["seconds"] = t_stop - t_start
+                self.records.append(record)
+            if self.callback is not None:
+                self.callback(record)
+        return
+
+    def to_dataframe(self) -> pandas.DataFrame:
+        """Creates a table of the records, ordered by the start of the stages.
+
+        Returns:
+            df (pandas.DataFrame): one row per stage with the `FIELDS` as columns
+        """
+        df = pandas.DataFrame(self.records, columns=list(FIELDS))
+        df = df.astype(
+            {"scope": "Int64", "rows": "Int64", "nbytes": "Int64", "peak_bytes": "Int64"}
+        )
+        return df.sort_values("start", kind="stable").reset_index(drop=True)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # callbacks and locks can't be pickled, and nothing is measured after unpickling
+        state.update(callback=None, _lock=None, _active={}, _tracing=False)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        return
+
+
+def stage(profile: Optional[ParseProfile], name: str, **kwargs):
+    """Measures a stage if a profile is given.
+
+    Args:
+        profile (ParseProfile or None): the profile to record to
+        name (str): name of the stage
+        **kwargs: further arguments of `ParseProfile.stage`
+
+    Returns:
+        context (contextmanager): yields the record (a dictionary that is discarded without profile)
+    """
+    if profile is None:
+        return contextlib.nullcontext({})
+    return profile.stage(name, **kwargs)
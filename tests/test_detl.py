@@ -1,14 +1,26 @@
 """Contains unit tests for the `detl` package"""
 
+import asyncio
+import concurrent.futures
 import datetime
+import os
 import pathlib
+import pickle
+import tempfile
+import threading
 import unittest
+import unittest.mock
 
 import numpy
 import pandas
 
 import detl
 
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
 dir_testfiles = pathlib.Path(pathlib.Path(__file__).absolute().parent, "testfiles")
 
 v4_testfiles = [
@@ -58,6 +70,28 @@ class TestParserSelection(unittest.TestCase):
             _ = detl.get_parser(pathlib.Path(dir_testfiles, "invalid.csv"))
         return
 
+    def test_sniff(self):
+        # the first non-ASCII byte of this latin-1 file comes long after the sniffed head
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        version, encoding = detl.sniff(filepath)
+        self.assertEqual(version, detl.DASwareVersion.V4)
+        self.assertEqual(encoding, "latin-1")
+        self.assertIn("Unit 1.T1.PV [°C]", detl.parse(filepath)[1].trackdata.columns)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fp = pathlib.Path(tmpdir, "latin.csv")
+            fp.write_bytes(b'"[Info]"\n"Product";"Host \xb0"\n"FngArchiv";"5.0.0";"PC"\n')
+            version, encoding = detl.sniff(fp)
+            self.assertEqual(version, detl.DASwareVersion.V5)
+            self.assertEqual(encoding, "latin-1")
+
+            head = b'"[Info]"\n"Product";"Host"\n"FngArchiv";"5.0.0";"PC"\n'
+            fp.write_bytes(head + b"x" * detl.SNIFF_BYTES + "\n°C\n".encode("utf-8"))
+            self.assertEqual(detl.sniff(fp)[1], "utf-8")
+            fp.write_bytes(head + b"x" * detl.SNIFF_BYTES + "\n°C\n".encode("latin-1"))
+            self.assertEqual(detl.sniff(fp)[1], "latin-1")
+        return
+
 
 class TestCommonParsing(unittest.TestCase):
     def test_split_blocks_v5(self):
@@ -97,6 +131,54 @@ class TestCommonParsing(unittest.TestCase):
             self.assertTrue("Profiles" in scoped_blocks[r])
         return
 
+    def test_index_blocks_v4(self):
+        with self.assertRaises(ValueError):
+            detl.parsing.common.index_blocks(["bla"])
+
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        scoped_blocks = detl.parsing.common.index_blocks(filepath)
+        self.assertEqual(set(scoped_blocks), {None, 1, 2, 3, 4})
+        self.assertTrue("TrackData" not in scoped_blocks[None])
+        for r in {1, 2, 3, 4}:
+            block = scoped_blocks[r]["TrackData"]
+            self.assertIsInstance(block, detl.parsing.common.Block)
+            self.assertTrue(block.read().startswith('"Timestamp";"Duration"'))
+            self.assertTrue("Sensor Elements" in scoped_blocks[r])
+
+        # the string blocks of split_blocks are the decoded byte ranges
+        text_blocks = detl.parsing.common.split_blocks(filepath)
+        self.assertEqual(text_blocks[2]["Unit"], scoped_blocks[2]["Unit"].read())
+        pandas.testing.assert_frame_equal(
+            detl.parsing.common.read_block(scoped_blocks[3]["TrackData"]),
+            detl.parsing.common.read_block(text_blocks[3]["TrackData"]),
+        )
+        return
+
+    def test_read_block_threaded(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        block = detl.parsing.common.index_blocks(filepath)[2]["TrackData"]
+        expected = detl.parsing.common.read_block(block)
+        actual = detl.parsing.common.read_block_threaded(block, n_threads=5, min_bytes=1000)
+        pandas.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+        # pieces that infer different types are combined like a single read would
+        lines = ['"No";"Value";"Comment";"Count"']
+        for i in range(200):
+            value = " 1.5" if i < 100 else "text"
+            comment = '""' if i < 150 else "note"
+            count = i if i < 100 else '""'
+            lines.append(f"{i};{value};{comment};{count}")
+        data = "\n".join(lines).encode()
+        block = detl.parsing.common.Block(data, 0, len(data))
+        pandas.testing.assert_frame_equal(
+            detl.parsing.common.read_block_threaded(block, n_threads=4, min_bytes=100),
+            detl.parsing.common.read_block(block),
+            check_exact=True,
+        )
+        with self.assertRaises(ValueError):
+            detl.parsing.common.read_block(block, engine="arrow")
+        return
+
     def test_parse_generic(self):
         filepath = pathlib.Path(dir_testfiles, "v5_short_CTPC06280.Control.csv")
         scoped_blocks = detl.parsing.common.split_blocks(filepath)
@@ -129,6 +211,43 @@ class TestCommonParsing(unittest.TestCase):
         self.assertIsInstance(dd, dict)
         self.assertEqual(dd.version, detl.DASwareVersion.V5)
 
+    def test_transform_trackdata_process_time(self):
+        trackdata = pandas.DataFrame(
+            {
+                "Timestamp": [f"2018-07-26 11:5{m}:36" for m in range(6)],
+                "Duration": numpy.arange(1, 7) / 1440,
+                "Unit 1.Inoculation Time []": [
+                    "1899-12-30 00:00:00",
+                    numpy.nan,
+                    "1899-12-30 00:00:00",
+                    "1899-12-30 00:01:00",
+                    numpy.nan,
+                    "1899-12-30 00:03:00",
+                ],
+            }
+        )
+        df = detl.parsing.common.transform_trackdata(trackdata, {}, detl.DASwareVersion.V4)
+        numpy.testing.assert_array_equal(
+            df["process_time"], [numpy.nan, numpy.nan, 0, 1 / 60, 1 / 60, 3 / 60]
+        )
+        return
+
+    def test_resolve_columns(self):
+        header = ("Timestamp", "Duration", "Unit 1.Inoculation Time []", "Unit 1.pH.PV [pH]")
+        mapping = (("ph_pv", r".*pH\.PV.*"), ("do_pv", r".*DO\.PV.*"))
+        inoculation, resolved = detl.parsing.common.resolve_columns(
+            header, ".*Inoculation Time.*", mapping
+        )
+        self.assertEqual(inoculation, 2)
+        self.assertEqual(resolved, (("ph_pv", 3),))
+        # the resolution is cached per header
+        hits = detl.parsing.common.resolve_columns.cache_info().hits
+        detl.parsing.common.resolve_columns(header, ".*Inoculation Time.*", mapping)
+        self.assertEqual(detl.parsing.common.resolve_columns.cache_info().hits, hits + 1)
+        with self.assertRaises(ValueError):
+            detl.parsing.common.resolve_columns(header, ".*Inoculation Time.*", (("x", ".*"),))
+        return
+
     def test_inoculation_times(self):
         filepath = pathlib.Path(dir_testfiles, "v4_NT-WMB-2.Control.csv")
         dd = detl.parse(
@@ -144,6 +263,16 @@ class TestCommonParsing(unittest.TestCase):
         return
 
 
+class TestUtils(unittest.TestCase):
+    def test_dwtimestamps_to_utc(self):
+        raw = pandas.Series(["2018-07-26 11:53:36", "2018-07-27 10:43:14"])
+        timestamps = detl.parsing.utils.dwtimestamps_to_utc(raw)
+        self.assertEqual(str(timestamps.dt.tz), "UTC")
+        for t, expected in zip(timestamps, raw):
+            self.assertEqual(t, detl.parsing.utils.dwtimestamp_to_utc(expected))
+        return
+
+
 class TestDW4Parsing(unittest.TestCase):
     def test_trackdata_row_count(self):
         for fp, row_counts, nunits in zip(v4_testfiles, v4_trackdata_nrows, v4_nreactors):
@@ -185,6 +314,128 @@ class TestDW4Parsing(unittest.TestCase):
 
         return
 
+    def test_version(self):
+        ddata = detl.parse(v4_testfiles[1])
+        self.assertEqual(ddata.version, detl.DASwareVersion.V4)
+        return
+
+    def test_parallel_reactors(self):
+        ddata = detl.parse(v4_testfiles[1])
+        ddata_parallel = detl.parse(v4_testfiles[1], n_jobs=4)
+        self.assertEqual(list(ddata_parallel), list(ddata))
+        pandas.testing.assert_frame_equal(ddata_parallel.events, ddata.events)
+        for r, reactor in ddata.items():
+            pandas.testing.assert_frame_equal(ddata_parallel[r].unit, reactor.unit)
+            pandas.testing.assert_frame_equal(ddata_parallel[r].trackdata, reactor.trackdata)
+            pandas.testing.assert_frame_equal(ddata_parallel[r].dataframe, reactor.dataframe)
+        return
+
+    def test_lazy(self):
+        ddata = detl.parse(v4_testfiles[1])
+        ddata_lazy = detl.parse(v4_testfiles[1], lazy=True)
+        self.assertIn("_events", ddata_lazy.pending)
+        self.assertIn("_dataframe", ddata_lazy[2].pending)
+        pandas.testing.assert_frame_equal(ddata_lazy[2].dataframe, ddata[2].dataframe)
+        self.assertNotIn("_dataframe", ddata_lazy[2].pending)
+        self.assertNotIn("_trackdata", ddata_lazy[2].pending)
+        self.assertIn("_unit", ddata_lazy[2].pending)
+        self.assertIsNone(ddata_lazy[2].requirements)
+
+        # pickling loads all pending tables
+        ddata_lazy = pickle.loads(pickle.dumps(ddata_lazy))
+        self.assertEqual(ddata_lazy.pending, ())
+        self.assertEqual(ddata_lazy[4].pending, ())
+        pandas.testing.assert_frame_equal(ddata_lazy.events, ddata.events)
+        pandas.testing.assert_frame_equal(ddata_lazy[4].unit, ddata[4].unit)
+        return
+
+    def test_keep_trackdata(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        expected = detl.parse(filepath)
+        data = detl.parse(filepath, keep_trackdata=False)
+        for r in data:
+            self.assertIsNone(data[r]._trackdata)
+            self.assertIn("_trackdata", data[r].pending)
+            pandas.testing.assert_frame_equal(data[r].dataframe, expected[r].dataframe)
+        pandas.testing.assert_frame_equal(data[2].trackdata, expected[2].trackdata)
+        self.assertNotIn("_trackdata", data[2].pending)
+
+        # released trackdata is not pickled, but parsed again from the file after unpickling
+        data = detl.parse(filepath, keep_trackdata=False, lazy=True, columns=["ph_pv"])
+        unpickled = pickle.loads(pickle.dumps(data))
+        self.assertIsNone(unpickled[1]._trackdata)
+        self.assertIn("_trackdata", unpickled[1].pending)
+        pandas.testing.assert_frame_equal(
+            unpickled[1].dataframe, detl.parse(filepath, columns=["ph_pv"])[1].dataframe
+        )
+        self.assertEqual(list(unpickled[1].trackdata.index), list(expected[1].trackdata.index))
+        return
+
+    def test_keep_trackdata_cache_hit(self):
+        with tempfile.TemporaryDirectory() as dir:
+            filepath = pathlib.Path(dir, "export.csv")
+            filepath.write_bytes(
+                pathlib.Path(dir_testfiles, "v4_20180726.Control.csv").read_bytes()
+            )
+            expected = detl.parse(filepath)
+            cache = detl.ParseCache(pathlib.Path(dir, "cache"))
+            detl.parse(filepath, cache=cache, keep_trackdata=False)
+            cached = detl.parse(filepath, cache=cache, keep_trackdata=False)
+            self.assertIn("_trackdata", cached[2].pending)
+            pandas.testing.assert_frame_equal(cached[2].trackdata, expected[2].trackdata)
+
+            # the trackdata is not parsed from a file that changed in the meantime
+            cached = detl.parse(filepath, cache=cache, keep_trackdata=False)
+            filepath.write_bytes(filepath.read_bytes() + b"\n")
+            with self.assertRaises(RuntimeError):
+                cached[3].trackdata
+        return
+
+    def test_compact(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        expected = detl.parse(filepath)
+        with self.assertLogs("detl.parsing.common", level="INFO"):
+            ddata = detl.parse(filepath, compact=True)
+        df = ddata[1].dataframe
+        self.assertEqual(df["volume_pv"].dtype, numpy.float32)
+        self.assertEqual(df["process_time"].dtype, numpy.float64)
+        self.assertEqual(df["timestamp"].dtype, expected[1].dataframe["timestamp"].dtype)
+        self.assertLess(df.memory_usage().sum(), expected[1].dataframe.memory_usage().sum())
+        numpy.testing.assert_allclose(
+            df["volume_pv"], expected[1].dataframe["volume_pv"], rtol=1e-6
+        )
+
+        # values that need double precision stay float64
+        df = pandas.DataFrame(
+            {
+                "a": [1000.126, numpy.nan],
+                "b": [12345678.901, 2],
+                "c": ["1.5", None],
+                "d": ["x", "1"],
+            }
+        )
+        compacted = detl.parsing.common.compact_dataframe(df)
+        self.assertEqual(compacted["a"].dtype, numpy.float32)
+        self.assertEqual(compacted["b"].dtype, numpy.float64)
+        self.assertEqual(compacted["c"].dtype, numpy.float32)
+        self.assertEqual(compacted["d"].dtype, df["d"].dtype)
+        return
+
+    def test_selection(self):
+        ddata = detl.parse(v4_testfiles[1])
+        ddata_selected = detl.parse(v4_testfiles[1], reactors=[3], columns=["do_pv", "ph_pv"])
+        self.assertEqual(list(ddata_selected), [3])
+        self.assertEqual(len(ddata_selected[3].trackdata.columns), 5)
+        expected = ddata[3].dataframe[["timestamp", "duration", "process_time", "do_pv", "ph_pv"]]
+        pandas.testing.assert_frame_equal(ddata_selected[3].dataframe, expected)
+        pandas.testing.assert_frame_equal(ddata_selected.events, ddata.events)
+
+        with self.assertRaises(KeyError):
+            detl.parse(v4_testfiles[1], columns=["do_pv", "not_a_column"])
+        with self.assertRaises(KeyError):
+            detl.parse(v4_testfiles[1], reactors=[5])
+        return
+
 
 class TestDW5Parsing(unittest.TestCase):
     def test_trackdata_row_count(self):
@@ -218,6 +469,331 @@ class TestDW5Parsing(unittest.TestCase):
         return
 
 
+class TestParseMany(unittest.TestCase):
+    def test_parse_many(self):
+        filepaths = [
+            pathlib.Path(dir_testfiles, "invalid.csv"),
+            pathlib.Path(dir_testfiles, "v4_20180726.Control.csv"),
+        ]
+        for max_workers in [1, 2]:
+            results = detl.parse_many(
+                filepaths,
+                max_workers=max_workers,
+                inoculation_times={
+                    filepaths[1]: {
+                        1: datetime.datetime(2018, 7, 26, 11, 53, 36, tzinfo=datetime.timezone.utc)
+                    }
+                },
+            )
+            self.assertEqual(list(results), filepaths)
+            self.assertIsInstance(results[filepaths[0]], NotImplementedError)
+            self.assertIsInstance(results[filepaths[1]], detl.DWData)
+            self.assertEqual(results[filepaths[1]][1].dataframe.process_time[0], 0)
+        return
+
+    def test_iparse_many(self):
+        filepaths = [pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")] * 2
+        results = list(detl.iparse_many(filepaths, max_workers=2))
+        self.assertEqual(len(results), 2)
+        for filepath, result in results:
+            self.assertEqual(filepath, filepaths[0])
+            self.assertEqual(len(result[3].trackdata), 1370)
+        return
+
+
+class TestParseAsync(unittest.TestCase):
+    def test_parse_async(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        expected = detl.parse(filepath, compact=True)
+
+        async def parse_all():
+            semaphore = asyncio.Semaphore(2)
+            return await asyncio.gather(
+                *(
+                    detl.parse_async(filepath, semaphore=semaphore, compact=True, profile=True)
+                    for _ in range(3)
+                )
+            )
+
+        for data in asyncio.run(parse_all()):
+            self.assertEqual(data.pending, ())
+            for r, reactor in expected.items():
+                self.assertEqual(data[r].pending, ())
+                pandas.testing.assert_frame_equal(data[r].dataframe, reactor.dataframe)
+            pandas.testing.assert_frame_equal(data.events, expected.events)
+            stages = set(data.parse_profile.to_dataframe().stage)
+            self.assertTrue({"parse", "sniff", "transform_trackdata"}.issubset(stages))
+        return
+
+    def test_cancel(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        executor = concurrent.futures.ThreadPoolExecutor(1)
+        blocker = threading.Event()
+        executor.submit(blocker.wait)
+
+        async def cancel():
+            task = asyncio.create_task(detl.parse_async(filepath, executor=executor))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            blocker.set()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel())
+        executor.shutdown(wait=True)
+        return
+
+
+class TestParseCache(unittest.TestCase):
+    def test_cache_hit(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        with tempfile.TemporaryDirectory() as dir:
+            cache = detl.ParseCache(dir)
+            expected = detl.parse(filepath, cache=cache)
+            self.assertEqual(len(list(pathlib.Path(dir).glob("*.pkl"))), 1)
+            cached = detl.parse(filepath, cache=dir)
+            self.assertIsNot(cached, expected)
+            pandas.testing.assert_frame_equal(cached[2].dataframe, expected[2].dataframe)
+            pandas.testing.assert_frame_equal(cached.events, expected.events)
+            # options that change the result are part of the key
+            detl.parse(filepath, cache=cache, reactors=[1])
+            self.assertEqual(len(list(pathlib.Path(dir).glob("*.pkl"))), 2)
+        return
+
+    def test_eviction(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        with tempfile.TemporaryDirectory() as dir:
+            cache = detl.ParseCache(dir, key="content")
+            detl.parse(filepath, cache=cache, reactors=[1])
+            detl.parse(filepath, cache=cache, reactors=[2])
+            cache.max_bytes = cache.nbytes - 1
+            cache.evict()
+            self.assertEqual(len(list(pathlib.Path(dir).glob("*.pkl"))), 1)
+            cache.clear()
+            self.assertEqual(cache.nbytes, 0)
+        with self.assertRaises(ValueError):
+            detl.ParseCache(dir, key="name")
+        return
+
+    @unittest.skipIf(os.name != "posix", "directory permissions are only checked on POSIX")
+    def test_shared_directory_warning(self):
+        with tempfile.TemporaryDirectory() as dir:
+            with self.assertNoLogs("detl.cache", level="WARNING"):
+                detl.ParseCache(pathlib.Path(dir, "private"))
+            os.chmod(dir, 0o777)
+            with self.assertLogs("detl.cache", level="WARNING"):
+                detl.ParseCache(dir)
+        return
+
+
+class TestCatalog(unittest.TestCase):
+    def test_scan_and_find(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        with tempfile.TemporaryDirectory() as dir:
+            with detl.Catalog(pathlib.Path(dir, "catalog.sqlite")) as catalog:
+                counts = catalog.scan(dir_testfiles)
+                self.assertGreater(counts["added"], 0)
+                self.assertEqual(counts["failed"], 1)
+                # unchanged files (including the invalid one) are skipped by rescans
+                counts = catalog.scan(dir_testfiles)
+                self.assertEqual(counts["added"] + counts["updated"] + counts["failed"], 0)
+
+                reactors = catalog.query(
+                    "SELECT reactor, rows, start, stop FROM reactors WHERE path = ?",
+                    (str(filepath),),
+                )
+                self.assertEqual(list(reactors.reactor), [1, 2, 3, 4])
+                self.assertEqual(list(reactors.rows), v4_trackdata_nrows[1])
+                self.assertEqual(reactors.start[0], "2018-07-26 11:53:36+00:00")
+                files = catalog.query("SELECT encoding FROM files WHERE path = ?", (str(filepath),))
+                self.assertEqual(list(files.encoding), ["latin-1"])
+
+                found = catalog.find(version="v4", reactor=3, columns=["ph_pv"])
+                self.assertIn(str(filepath), found)
+                self.assertEqual(catalog.find(version="v4", reactor=5), [])
+                self.assertEqual(catalog.find(columns=["not_a_column"]), [])
+                self.assertIn(
+                    str(filepath),
+                    catalog.find(
+                        start=datetime.datetime(2018, 7, 27, tzinfo=datetime.timezone.utc),
+                        stop=datetime.datetime(2018, 7, 28, tzinfo=datetime.timezone.utc),
+                    ),
+                )
+                self.assertEqual(
+                    catalog.find(start=datetime.datetime(2019, 1, 1, tzinfo=datetime.timezone.utc)),
+                    [],
+                )
+
+                data = catalog.open(found[0])
+                self.assertEqual(len(data[3].dataframe), v4_trackdata_nrows[1][2])
+        return
+
+
+class TestParseProfile(unittest.TestCase):
+    def test_stages(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        records = []
+        data = detl.parse(filepath, profile=detl.ParseProfile(callback=records.append))
+        self.assertIsNone(detl.parse(filepath).parse_profile)
+        df = data.parse_profile.to_dataframe()
+        self.assertEqual(len(df), len(records))
+        self.assertEqual(df.stage[0], "parse")
+        self.assertEqual(df.nbytes[0], filepath.stat().st_size)
+        trackdata = df[(df.stage == "parse_block") & (df.block == "TrackData")]
+        self.assertEqual(list(trackdata.scope), [1, 2, 3, 4])
+        self.assertEqual(list(trackdata.rows), v4_trackdata_nrows[1])
+        transform = df[df.stage == "transform_trackdata"]
+        self.assertEqual(list(transform.rows), v4_trackdata_nrows[1])
+        self.assertTrue((df.peak_bytes > 0).all())
+        # the stages are nested in the entire parse
+        self.assertTrue((df.seconds[1:] <= df.seconds[0]).all())
+        # lazily loaded tables are recorded on first access
+        data = detl.parse(filepath, lazy=True, profile=detl.ParseProfile(memory=False))
+        self.assertNotIn("transform_trackdata", set(data.parse_profile.to_dataframe().stage))
+        data[1].dataframe
+        df = data.parse_profile.to_dataframe()
+        self.assertEqual(list(df[df.stage == "transform_trackdata"].scope), [1])
+        self.assertTrue(df.peak_bytes.isna().all())
+        return
+
+
+@unittest.skipIf(pyarrow is None, "requires pyarrow")
+class TestParquet(unittest.TestCase):
+    def test_roundtrip(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        data = detl.parse(filepath)
+        with tempfile.TemporaryDirectory() as dir:
+            data.to_parquet(dir)
+            self.assertTrue(pathlib.Path(dir, "dataframe", "reactor=3", "part-0.parquet").exists())
+            loaded = detl.DWData.from_parquet(dir)
+            self.assertEqual(loaded.version, detl.DASwareVersion.V4)
+            self.assertEqual(list(loaded), [1, 2, 3, 4])
+            self.assertIn("_dataframe", loaded[1].pending)
+            for r in data:
+                pandas.testing.assert_frame_equal(loaded[r].dataframe, data[r].dataframe)
+                pandas.testing.assert_frame_equal(loaded[r].setup, data[r].setup)
+            pandas.testing.assert_frame_equal(loaded.events, data.events)
+            pandas.testing.assert_frame_equal(loaded.units, data.units)
+            self.assertEqual(loaded.projectinfo.shape, data.projectinfo.shape)
+
+            selected = detl.DWData.from_parquet(dir, reactors=[2], columns=["ph_pv"])
+            self.assertEqual(list(selected), [2])
+            self.assertEqual(
+                list(selected[2].dataframe.columns),
+                ["timestamp", "duration", "process_time", "ph_pv"],
+            )
+            with self.assertRaises(KeyError):
+                detl.DWData.from_parquet(dir, reactors=[5])
+        return
+
+    def test_to_arrow(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        data = detl.parse(filepath)
+        table = data.to_arrow()
+        self.assertEqual(table.column_names[0], "reactor")
+        self.assertEqual(table.num_rows, sum(len(reactor.dataframe) for reactor in data.values()))
+        self.assertEqual(table.schema.metadata[b"dasware_version"], b"v4")
+        return
+
+
+class TestIncrementalParser(unittest.TestCase):
+    def test_refresh(self):
+        lines = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv").read_bytes().split(b"\n")
+        # an earlier export is missing the last 500 rows of each trackdata block
+        earlier = []
+        for l, line in enumerate(lines):
+            if b"[TrackData" in line and lines[l + 1].strip():
+                stop = l + next(i for i, x in enumerate(lines[l:]) if not x.strip())
+                earlier.append((stop - 500, stop))
+        with tempfile.TemporaryDirectory() as dir:
+            filepath = pathlib.Path(dir, "growing.csv")
+            skip = set(i for start, stop in earlier for i in range(start, stop))
+            filepath.write_bytes(b"\n".join(x for i, x in enumerate(lines) if not i in skip))
+            parser = detl.IncrementalParser(filepath)
+            first = parser.refresh()
+            self.assertEqual(len(first[1].dataframe), 871)
+
+            filepath.write_bytes(b"\n".join(lines))
+            data = parser.refresh()
+            self.assertIs(data, first)
+            expected = detl.parse(filepath)
+            for r in expected:
+                pandas.testing.assert_frame_equal(data[r].dataframe, expected[r].dataframe)
+                self.assertEqual(len(data[r].trackdata), len(expected[r].trackdata))
+
+            # other changes make it parse the entire file again
+            filepath.write_bytes(b"\n".join(lines).replace(b"2018-07-27", b"2018-07-28"))
+            self.assertIsNot(parser.refresh(), first)
+        return
+
+    def test_refresh_after_set_inoculation_times(self):
+        lines = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv").read_bytes().split(b"\n")
+        start = lines.index(b'"[TrackData1]"') + 2
+        stop = start + next(i for i, x in enumerate(lines[start:]) if not x.strip())
+        inoculation = datetime.datetime(2018, 7, 26, 13, tzinfo=datetime.timezone.utc)
+        with tempfile.TemporaryDirectory() as dir:
+            filepath = pathlib.Path(dir, "growing.csv")
+            filepath.write_bytes(b"\n".join(lines[: stop - 50] + lines[stop:]))
+            parser = detl.IncrementalParser(filepath, reactors=[1])
+            data = parser.refresh()
+            data.set_inoculation_times({1: inoculation})
+            self.assertEqual(data[1].dataframe.process_time.isna().sum(), 67)
+
+            filepath.write_bytes(b"\n".join(lines))
+            self.assertIs(parser.refresh(), data)
+            expected = detl.parse(filepath, reactors=[1], inoculation_times={1: inoculation})
+            pandas.testing.assert_frame_equal(data[1].dataframe, expected[1].dataframe)
+
+            # restoring gives the exported process time of all rows
+            data.set_inoculation_times({1: None})
+            pandas.testing.assert_frame_equal(
+                data[1].dataframe, detl.parse(filepath, reactors=[1])[1].dataframe
+            )
+        return
+
+    def test_replaced_while_parsing(self):
+        lines = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv").read_bytes().split(b"\n")
+        start = lines.index(b'"[TrackData1]"') + 2
+        stop = start + next(i for i, x in enumerate(lines[start:]) if not x.strip())
+        with tempfile.TemporaryDirectory() as dir:
+            filepath = pathlib.Path(dir, "growing.csv")
+            filepath.write_bytes(b"\n".join(lines[: stop - 25] + lines[stop:]))
+            replacement = pathlib.Path(dir, "replacement.csv")
+            replacement.write_bytes(b"\n".join(lines))
+            index_blocks = detl.parsing.common.index_blocks
+
+            def index_and_replace(*args, **kwargs):
+                # the exporter replaces the file right after it was indexed
+                scoped_blocks = index_blocks(*args, **kwargs)
+                if replacement.exists():
+                    os.replace(replacement, filepath)
+                return scoped_blocks
+
+            parser = detl.IncrementalParser(filepath, reactors=[1])
+            with unittest.mock.patch.object(detl.parsing.common, "index_blocks", index_and_replace):
+                self.assertEqual(len(parser.refresh()[1].dataframe), 1371 - 25)
+            data = parser.refresh()
+            expected = detl.parse(filepath, reactors=[1])
+            pandas.testing.assert_frame_equal(data[1].dataframe, expected[1].dataframe)
+        return
+
+
+class TestIterTrackdata(unittest.TestCase):
+    def test_chunks(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        expected = detl.parse(filepath, reactors=[2])[2].dataframe
+        # the process time of this reactor starts at row 117
+        for chunksize in [117, 118, 500]:
+            chunks = list(detl.iter_trackdata(filepath, 2, chunksize=chunksize))
+            self.assertTrue(all(len(chunk) <= chunksize for chunk in chunks))
+            df = pandas.concat(chunks)
+            pandas.testing.assert_frame_equal(df[expected.columns], expected)
+            self.assertTrue(df.drop(columns=expected.columns).isna().all().all())
+        with self.assertRaises(KeyError):
+            next(detl.iter_trackdata(filepath, 7))
+        return
+
+
 class TestClosestDataLookup(unittest.TestCase):
     def test_dw4(self):
         ddata = detl.parse(v4_testfiles[0])
@@ -241,6 +817,32 @@ class TestClosestDataLookup(unittest.TestCase):
             for i, o in zip(looked_up_data["ctr_pv"], expected_output)
         ]
 
+    def test_sorted_search(self):
+        reactor = detl.core.ReactorData(1)
+        reactor._dataframe = pandas.DataFrame(
+            {"process_time": [numpy.nan, 3, 1, numpy.nan, 1, 3, 2], "value": range(7)}
+        )
+        # missing values are skipped and ties resolve to the first row
+        closest = reactor.get_closest_data([2, 1.5, 2.5, 0, 5])
+        numpy.testing.assert_array_equal(closest["value"], [6, 2, 1, 2, 1])
+        closest = reactor.get_closest_data([1.2, 1.6, numpy.nan], tolerance=0.3)
+        numpy.testing.assert_array_equal(closest["value"], [2])
+        self.assertEqual(pickle.loads(pickle.dumps(reactor))._sorted_indices, {})
+        return
+
+    def test_dwdata(self):
+        ddata = detl.parse(v4_testfiles[1])
+        closest = ddata.get_closest_data({1: [0, 5], 3: [2]}, reference="duration")
+        self.assertEqual(list(closest.columns[:3]), ["reactor", "point", "timestamp"])
+        numpy.testing.assert_array_equal(closest["reactor"], [1, 1, 3])
+        numpy.testing.assert_array_equal(closest["point"], [0, 5, 2])
+        pandas.testing.assert_series_equal(
+            closest.iloc[2, 2:],
+            ddata[3].get_closest_data([2], reference="duration").iloc[0],
+            check_names=False,
+        )
+        return
+
 
 class TestGetNarrowData(unittest.TestCase):
     def test_with_process_time(self):
@@ -255,12 +857,190 @@ class TestGetNarrowData(unittest.TestCase):
         self.assertAlmostEqual(nd.loc[20456]["value"], 29.889, places=3)
         self.assertAlmostEqual(nd.loc[15643]["time"], 39.35, places=3)
 
+    def test_dtypes(self):
+        ddata = detl.parse(v4_testfiles[1])
+        nd = ddata.get_narrow_data(kdim="timestamp", dtype=numpy.float32)
+        self.assertIsInstance(nd["reactor"].dtype, pandas.CategoricalDtype)
+        self.assertIsInstance(nd["variable"].dtype, pandas.CategoricalDtype)
+        self.assertEqual(nd["value"].dtype, numpy.float32)
+        self.assertEqual(nd["time"].dtype, ddata[1].dataframe["timestamp"].dtype)
+        # the values of each reactor are stacked column by column
+        df = ddata[2].dataframe
+        nd = nd[nd["reactor"] == 2]
+        numpy.testing.assert_array_equal(nd["time"].iloc[: len(df)], df["timestamp"])
+        numpy.testing.assert_array_equal(nd["variable"].iloc[len(df)], df.columns[2])
+        return
+
     def test_kdim_setting(self):
         ddata = detl.parse(v4_testfiles[0])
         with self.assertRaises(KeyError):
             ddata.get_narrow_data(kdim="volume_pv")
 
 
+class TestWindow(unittest.TestCase):
+    def test_reactor_window(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        reactor = detl.parse(filepath)[2]
+        df = reactor.dataframe
+        expected = df[(df.process_time >= 2) & (df.process_time <= 5)]
+        pandas.testing.assert_frame_equal(reactor.window(2, 5), expected)
+        pandas.testing.assert_frame_equal(
+            reactor.window(None, 0.5, kdim="duration"), df[df.duration <= 0.5]
+        )
+        self.assertEqual(len(reactor.window(5, 2)), 0)
+
+        # rows that are not in chronological order are returned in their original order
+        shuffled = df.sample(frac=1, random_state=1)
+        reactor._dataframe = shuffled
+        pandas.testing.assert_frame_equal(
+            reactor.window(2, 5),
+            shuffled[(shuffled.process_time >= 2) & (shuffled.process_time <= 5)],
+        )
+        with self.assertRaises(KeyError):
+            reactor.window(2, 5, kdim="time")
+        return
+
+    def test_dwdata_window(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        data = detl.parse(filepath)
+        event_times = pandas.to_datetime(data.events.Timestamp, utc=True)
+
+        start = datetime.datetime(2018, 7, 26, 14, tzinfo=datetime.timezone.utc)
+        end = datetime.datetime(2018, 7, 26, 18, tzinfo=datetime.timezone.utc)
+        window = data.window(start, end, kdim="timestamp")
+        self.assertIsInstance(window, detl.WindowData)
+        self.assertEqual(list(window), [1, 2, 3, 4])
+        for r, df in window.items():
+            timestamps = data[r].dataframe.timestamp
+            pandas.testing.assert_frame_equal(
+                df, data[r].dataframe[(timestamps >= start) & (timestamps <= end)]
+            )
+        pandas.testing.assert_frame_equal(
+            window.events, data.events[(event_times >= start) & (event_times <= end)]
+        )
+        self.assertGreater(len(window.events), 0)
+
+        # with other time axes, the events are selected by the timestamps of the rows
+        window = data.window(2, 5)
+        first = min(df.timestamp.min() for df in window.values())
+        last = max(df.timestamp.max() for df in window.values())
+        pandas.testing.assert_frame_equal(
+            window.events, data.events[(event_times >= first) & (event_times <= last)]
+        )
+        self.assertEqual(len(data.window(1000, 2000).events), 0)
+        with self.assertRaises(KeyError):
+            data.window(2, 5, kdim="time")
+        return
+
+    def test_inplace_edits(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        data = detl.parse(filepath)
+        reactor = data[2]
+        df = reactor.dataframe
+        self.assertGreater(len(reactor.window(0, 2)), 0)
+        reactor.get_closest_data([1.0])
+
+        # the cached sort orders are not used after the columns were edited in-place
+        df.loc[:, "process_time"] = df["process_time"] + 10
+        self.assertEqual(len(reactor.window(0, 2)), 0)
+        pandas.testing.assert_frame_equal(
+            reactor.window(10, 12), df[(df.process_time >= 10) & (df.process_time <= 12)]
+        )
+        closest = reactor.get_closest_data([1.0])
+        self.assertEqual(closest.index[0], df.process_time.idxmin())
+
+        start = datetime.datetime(2018, 7, 26, 14, tzinfo=datetime.timezone.utc)
+        end = datetime.datetime(2018, 7, 26, 18, tzinfo=datetime.timezone.utc)
+        self.assertGreater(len(data.window(start, end, kdim="timestamp").events), 0)
+        data.events.loc[:, "Timestamp"] = "2000-01-01 00:00:00"
+        self.assertEqual(len(data.window(start, end, kdim="timestamp").events), 0)
+        return
+
+
+class TestToAligned(unittest.TestCase):
+    def test_linear(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        data = detl.parse(filepath)
+        grid = numpy.arange(-1, 30, 0.5)
+        aligned = data.to_aligned(grid, columns=["ph_pv", "do_pv", "unknown"])
+        self.assertIsInstance(aligned, detl.AlignedData)
+        self.assertEqual(aligned.values.shape, (4, len(grid), 3))
+        self.assertEqual(aligned.reactors, [1, 2, 3, 4])
+        self.assertTrue(numpy.isnan(aligned.values[:, :, 2]).all())
+        for r, reactor in enumerate(data.values()):
+            df = reactor.dataframe.dropna(subset=["process_time"])
+            expected = numpy.interp(
+                grid, df.process_time, df.ph_pv, left=numpy.nan, right=numpy.nan
+            )
+            numpy.testing.assert_allclose(aligned.values[r, :, 0], expected, rtol=1e-12)
+        ph = aligned.get("ph_pv")
+        self.assertEqual(list(ph.columns), [1, 2, 3, 4])
+        numpy.testing.assert_array_equal(ph.index, grid)
+        self.assertEqual(aligned.to_dataframe().shape, (4 * len(grid), 3))
+        return
+
+    def test_asof(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        data = detl.parse(filepath)
+        df = data[2].dataframe
+        grid = df.timestamp.iloc[[0, 10, 100]] + pandas.Timedelta(seconds=1)
+        aligned = data.to_aligned(grid, kdim="timestamp", columns=["ph_pv"], method="asof")
+        numpy.testing.assert_array_equal(
+            aligned.get("ph_pv")[2].to_numpy(), df.ph_pv.iloc[[0, 10, 100]].to_numpy()
+        )
+        with self.assertRaises(ValueError):
+            data.to_aligned(grid, kdim="timestamp", method="nearest")
+        return
+
+
+class TestSetInoculationTimes(unittest.TestCase):
+    def test_set_and_restore(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        inoculation = datetime.datetime(2018, 7, 26, 13, tzinfo=datetime.timezone.utc)
+        data = detl.parse(filepath)
+        exported = data[1].dataframe.copy()
+        self.assertEqual(data.inoculation_times, {1: None, 2: None, 3: None, 4: None})
+        self.assertEqual(len(data[1].window(0, 1)), 61)
+
+        data.set_inoculation_times({1: inoculation})
+        self.assertEqual(data[1].inoculation_time, pandas.Timestamp(inoculation))
+        expected = (exported.timestamp - inoculation).dt.total_seconds() / 3600
+        expected.name = "process_time"
+        expected[expected < 0] = numpy.nan
+        pandas.testing.assert_series_equal(data[1].dataframe.process_time, expected)
+        # the sorted index of the process time follows the new reference
+        window = data[1].window(0, 1)
+        self.assertEqual(window.timestamp.iloc[0], pandas.Timestamp("2018-07-26 13:00:36Z"))
+        pandas.testing.assert_frame_equal(data[2].dataframe, detl.parse(filepath)[2].dataframe)
+
+        # the same result as overriding the inoculation time while parsing
+        parsed = detl.parse(filepath, inoculation_times={1: inoculation})
+        pandas.testing.assert_frame_equal(parsed[1].dataframe, data[1].dataframe)
+
+        data.set_inoculation_times({1: None})
+        pandas.testing.assert_frame_equal(data[1].dataframe, exported)
+        self.assertEqual(len(data[1].window(0, 1)), 61)
+
+        with self.assertRaises(KeyError):
+            data.set_inoculation_times({5: inoculation})
+        with self.assertRaises(ValueError):
+            data.set_inoculation_times({1: datetime.datetime(2018, 7, 26, 13)})
+        return
+
+    def test_lazy(self):
+        filepath = pathlib.Path(dir_testfiles, "v4_20180726.Control.csv")
+        inoculation = datetime.datetime(2018, 7, 26, 13, tzinfo=datetime.timezone.utc)
+        data = detl.parse(filepath, lazy=True, inoculation_times={2: inoculation})
+        # the override doesn't load the dataframe
+        self.assertIn("_dataframe", data[2].pending)
+        unpickled = pickle.loads(pickle.dumps(data))
+        for reactor in [data[2], unpickled[2]]:
+            process_time = reactor.dataframe.process_time
+            self.assertTrue(numpy.isnan(process_time.iloc[0]))
+            self.assertEqual(process_time.iloc[-1], 21.713333333333335)
+        return
+
+
 class TestReactorDataProps(unittest.TestCase):
     def test_reactor_data(self):
         ddata = detl.parse(v4_testfiles[0])